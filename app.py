@@ -7,38 +7,116 @@ SRC_DIR = os.path.join(ROOT_DIR, "src")
 if SRC_DIR not in sys.path:
     sys.path.append(SRC_DIR)
 
-from optimization.optimize_glp1 import optimize_for_diabetes, optimize_for_obesity
-from optimization.optimize_ms import optimize_for_ms
-
 import streamlit as st
 import requests
 import socket
 
 API_URL = "http://127.0.0.1:8000"  # FastAPI backend
 
+# How long a backend availability check and a cached backend result stay
+# valid; local fallback results only live as long as an availability check
+BACKEND_CHECK_TTL = 15
+RESULT_CACHE_TTL = 3600
+LOCAL_RESULT_TTL = BACKEND_CHECK_TTL
+
+
+class BackendUnavailable(Exception):
+    """The backend could not serve a request (not cached by st.cache_data)."""
+
+
+@st.cache_resource
+def _http_session() -> requests.Session:
+    """
+    One pooled HTTP session per Streamlit server process, shared by all
+    sessions and reruns, so backend calls reuse keep-alive connections.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
 def _call_backend(payload: dict, timeout: float = 2.0):
     """
     Try to call the FastAPI backend. If it's unavailable, return None.
     """
+    if not _is_backend_up():
+        return None
     try:
-        resp = requests.post(f"{API_URL}/optimize", json=payload, timeout=timeout)
+        resp = _http_session().post(f"{API_URL}/optimize", json=payload, timeout=timeout)
         if resp.status_code == 200:
             return resp.json()
         return None
     except (requests.RequestException, socket.timeout):
+        # Re-check availability on the next call instead of trusting the cache
+        _is_backend_up.clear()
         return None
 
 
-def _is_backend_up(timeout: float = 0.5) -> bool:
+def _probe_backend(timeout: float = 0.5) -> bool:
     """Quick check whether local backend is reachable."""
     try:
-        resp = requests.get(f"{API_URL}/", timeout=timeout)
+        resp = _http_session().get(f"{API_URL}/", timeout=timeout)
         return resp.status_code == 200
     except Exception:
         return False
 
 
+@st.cache_data(ttl=BACKEND_CHECK_TTL, show_spinner=False)
+def _is_backend_up() -> bool:
+    """Backend availability, re-probed at most every BACKEND_CHECK_TTL seconds."""
+    return _probe_backend()
+
+
+@st.cache_resource(show_spinner="Loading models…")
+def _local_optimizers():
+    """
+    Import the optimizers and load every model artifact once per server
+    process (reused across reruns and sessions).
+    """
+    # Imported on first use: the backend usually serves the request
+    from optimization.optimize_glp1 import optimize_for_diabetes, optimize_for_obesity
+    from optimization.optimize_ms import optimize_for_ms
+    from optimization.warmup import warm_up
+
+    warm_up()
+    return {
+        "diabetes": optimize_for_diabetes,
+        "obesity": optimize_for_obesity,
+        "ms": optimize_for_ms,
+    }
+
+
+@st.cache_data(ttl=RESULT_CACHE_TTL, max_entries=512, show_spinner=False)
+def _backend_optimize(disease: str, sequence: str, top_k: int):
+    """Backend candidates keyed by (disease, sequence, top_k); raises BackendUnavailable."""
+    payload = {"disease": disease, "starting_sequence": sequence, "top_k": top_k}
+    data = _call_backend(payload)
+    if data is None or "candidates" not in data:
+        raise BackendUnavailable()
+    return data["candidates"]
+
+
+@st.cache_data(ttl=LOCAL_RESULT_TTL, max_entries=512, show_spinner=False)
+def _local_optimize(disease: str, sequence: str, top_k: int):
+    """Local optimizer candidates, kept briefly so reruns during an outage are cheap."""
+    return _local_optimizers()[disease](sequence, top_k)
+
+
+def _optimize(disease: str, sequence: str, top_k: int):
+    """
+    Optimization results: the backend when reachable, else the local
+    optimizers. Returns (candidates, source). Only backend results are
+    cached for long, so the local fallback (and its notice) is not served
+    once the backend is back. Failures raise, so they are not cached.
+    """
+    try:
+        return _backend_optimize(disease, sequence, top_k), "backend"
+    except BackendUnavailable:
+        return _local_optimize(disease, sequence, top_k), "local"
+
+
 _backend_started = False
 def start_local_backend_if_needed(wait: float = 2.0):
     """
@@ -50,7 +128,7 @@ def start_local_backend_if_needed(wait: float = 2.0):
     if _backend_started:
         return
 
-    if _is_backend_up():
+    if _probe_backend():
         _backend_started = True
         return
 
@@ -73,8 +151,9 @@ def start_local_backend_if_needed(wait: float = 2.0):
         import time
         t_end = time.time() + wait
         while time.time() < t_end:
-            if _is_backend_up():
+            if _probe_backend():
                 _backend_started = True
+                _is_backend_up.clear()
                 return
             time.sleep(0.2)
     except Exception:
@@ -124,29 +203,16 @@ if st.button("Optimize"):
             "starting_sequence": sequence.strip(),
             "top_k": top_k,
         }
-        # First try the remote backend (useful during local development when FastAPI is running)
-        data = _call_backend(payload)
-
-        # Fallback to local optimization functions when backend is not reachable
-        if data is None:
-            st.info("Backend not reachable — running local optimization (this may load model files).")
-            disease_key = payload["disease"]
-            try:
-                if disease_key == "diabetes":
-                    candidates = optimize_for_diabetes(payload["starting_sequence"], payload["top_k"])
-                elif disease_key == "obesity":
-                    candidates = optimize_for_obesity(payload["starting_sequence"], payload["top_k"])
-                else:
-                    candidates = optimize_for_ms(payload["starting_sequence"], payload["top_k"])
-
-                data = {"candidates": candidates}
-            except Exception as e:
-                # Show an informative error to the user instead of crashing
-                st.error("Local optimization failed: " + str(e))
-                data = {"candidates": []}
+        try:
+            candidates, source = _optimize(payload["disease"], payload["starting_sequence"], payload["top_k"])
+            if source == "local":
+                st.info("Backend not reachable — ran local optimization.")
+        except Exception as e:
+            # Show an informative error to the user instead of crashing
+            st.error("Local optimization failed: " + str(e))
+            candidates = []
 
         st.subheader("Optimized candidates")
-        candidates = data.get("candidates", [])
 
         if not candidates:
             st.warning("No candidates returned.")
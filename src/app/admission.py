@@ -0,0 +1,145 @@
+import threading
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """Raised when CPU-bound work is turned away; the API answers 429."""
+
+
+class AdmissionController:
+    """
+    Bounded concurrency for CPU-bound optimization work.
+
+    At most `max_concurrent` computations run at once, and at most
+    `max_queue` more wait for a slot. Requests beyond that are rejected
+    immediately, as are waiters not admitted within `queue_timeout`
+    seconds, so a load spike turns into fast 429s instead of an ever
+    longer queue. max_concurrent <= 0 disables the limit.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @contextmanager
+    def slot(self):
+        """Hold a computation slot for the duration of the block; raises Overloaded."""
+        release = self.reserve()
+        try:
+            yield
+        finally:
+            release()
+
+    def reserve(self):
+        """
+        Take a computation slot now and return a function that frees it;
+        raises Overloaded. For work that outlives the call admitting it
+        (e.g. a streamed response). Calling the function again is a no-op.
+        """
+        if self.max_concurrent <= 0:
+            return lambda: None
+
+        with self._cond:
+            if self.running >= self.max_concurrent:
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise Overloaded("Server busy: optimization queue is full")
+                self.waiting += 1
+                try:
+                    admitted = self._cond.wait_for(lambda: self.running < self.max_concurrent, self.queue_timeout)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    self.timeouts += 1
+                    raise Overloaded("Server busy: timed out waiting for an optimization slot")
+            self.running += 1
+            self.admitted += 1
+
+        released = False
+
+        def release():
+            nonlocal released
+            with self._cond:
+                if released:
+                    return
+                released = True
+                self.running -= 1
+                self._cond.notify()
+
+        return release
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "queue_timeout_seconds": self.queue_timeout,
+                "running": self.running,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller (the
+    leader) runs the computation, callers arriving while it is in flight
+    wait for and share its result or exception. Nothing is kept once the
+    call finishes; later calls go to the result cache.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Return (fn() or the in-flight result for `key`, whether it was shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "coalesced": self.coalesced}
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    In-process LRU cache for optimization results, with a size and TTL limit.
+
+    Each entry holds the ranked candidates computed at some depth (the
+    top_k it was computed with). Any request for a top_k up to that depth
+    is served by slicing; an entry that returned fewer candidates than its
+    depth is complete and serves every top_k.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (candidates, depth, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, top_k: int):
+        """Return the cached top_k candidates for `key`, or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                candidates, depth, expires_at = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                elif top_k <= depth or len(candidates) < depth:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return candidates[:top_k]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, candidates, depth: int):
+        """Store candidates computed at `depth`, evicting the LRU entries if full."""
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None and old[1] > depth and old[2] > time.monotonic():
+                return  # keep the deeper entry
+
+            self._entries[key] = (list(candidates), depth, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,529 @@
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from ..optimization.evolve_ms import evolve_for_ms
+from ..optimization.optimize_batch import optimize_batch
+from ..optimization.scan import scan
+from ..optimization.warmup import reload_models
+
+# Model slots of the top-level `optimization.*` modules (see main.py)
+from optimization.score_glp1_sequence import MODEL_SLOT as GLP1_SLOT
+from optimization.score_ms_sequence import MODEL_SLOT as MS_SLOT
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Job store location and the number of jobs run at once
+JOB_DB_PATH = os.environ.get("PEPTIDE_JOB_DB", os.path.join(ROOT_DIR, "data", "processed", "jobs.sqlite3"))
+JOB_WORKERS = int(os.environ.get("PEPTIDE_JOB_WORKERS", "2"))
+
+# A job interrupted this many times (e.g. by crashes) is failed instead of re-run
+MAX_ATTEMPTS = 3
+
+# Running jobs refresh their heartbeat every HEARTBEAT_INTERVAL seconds; a
+# job whose heartbeat is older than HEARTBEAT_TIMEOUT, or whose worker
+# process on this host is gone, is considered interrupted
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT_TIMEOUT = 30.0
+
+# Seconds before resubmitting a job after its worker pool broke, doubled on
+# each further failure; after MAX_ATTEMPTS broken pools the job is failed
+RESUBMIT_BACKOFF = 1.0
+
+# Minimum seconds between progress writes (and cancellation checks) of a job
+PROGRESS_INTERVAL = 0.5
+
+# Batch items optimized between progress checkpoints
+BATCH_CHUNK = 32
+
+STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    owner TEXT,
+    heartbeat_at REAL
+)
+"""
+
+# Columns added after the first release of the table: (name, declaration)
+_ADDED_COLUMNS = (("owner", "TEXT"), ("heartbeat_at", "REAL"))
+
+
+def _now():
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def worker_id():
+    """Owner recorded on the jobs this process runs: "<hostname>:<pid>"."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_alive(owner):
+    """
+    False when `owner` is a process of this host that no longer exists,
+    True when it exists, None when that cannot be told from here (other
+    hosts are judged by their heartbeat only).
+    """
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobCancelled(Exception):
+    """Raised at a progress checkpoint of a job whose cancellation was requested."""
+
+
+# ---------- STORE ----------
+
+class JobStore:
+    """
+    Durable job records in a SQLite database (WAL mode, so the API can read
+    while worker processes write).
+
+    Every state change is a single conditional UPDATE, so the API and the
+    workers never overwrite each other: a worker only claims a job that is
+    still queued, and a cancelled job is never marked as succeeded.
+
+    A claimed job records its owner (worker host and pid) and a heartbeat.
+    Several API processes can share one store: each only takes back
+    running jobs whose owner is gone or whose heartbeat went stale.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, declaration in _ADDED_COLUMNS:
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {declaration}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _record(row, full=True):
+        job = {k: row[k] for k in row.keys() if k not in ("params", "result", "cancel_requested")}
+        job["cancel_requested"] = bool(row["cancel_requested"])
+        if full:
+            job["params"] = json.loads(row["params"])
+            job["result"] = json.loads(row["result"]) if row["result"] is not None else None
+        return job
+
+    def create(self, kind: str, params) -> str:
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params), _now()),
+            )
+        return job_id
+
+    def get(self, job_id: str):
+        """The full job record (params and result included), or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._record(row) if row is not None else None
+
+    def list(self, status: str = None, limit: int = 50):
+        """Most recent jobs first, without params and results."""
+        query, args = "SELECT * FROM jobs", ()
+        if status is not None:
+            query, args = query + " WHERE status = ?", (status,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY rowid DESC LIMIT ?", args + (limit,)).fetchall()
+        return [self._record(row, full=False) for row in rows]
+
+    def counts(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: 0 for status in STATUSES} | {s: n for s, n in rows}
+
+    def queued(self):
+        """Ids of the queued jobs, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY rowid").fetchall()
+        return [row["id"] for row in rows]
+
+    def claim(self, job_id: str, owner: str):
+        """
+        Move a queued job to running on behalf of `owner`; returns (kind,
+        params), or None if it is no longer queued (e.g. claimed by another
+        worker).
+        """
+        with self._connect() as conn:
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1, "
+                "owner = ?, heartbeat_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (_now(), owner, time.time(), job_id),
+            ).rowcount
+            if not claimed:
+                return None
+            row = conn.execute("SELECT kind, params FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["kind"], json.loads(row["params"])
+
+    def heartbeat(self, job_id: str, owner: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running' AND owner = ?",
+                (time.time(), job_id, owner),
+            )
+
+    def set_progress(self, job_id: str, progress: float, owner: str, message: str = None) -> bool:
+        """
+        Record the progress of a job `owner` is running. Returns True when
+        it should stop: cancellation was requested, or the job was taken
+        back from this owner.
+        """
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET progress = ?, message = COALESCE(?, message), heartbeat_at = ? "
+                "WHERE id = ? AND status = 'running' AND owner = ?",
+                (progress, message, time.time(), job_id, owner),
+            ).rowcount
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return not updated or bool(row and row["cancel_requested"])
+
+    def finish(self, job_id: str, status: str, result=None, error: str = None, owner: str = None,
+               from_status: str = "running"):
+        """Record the outcome of a job still in `from_status` (and still `owner`'s, if given)."""
+        query = (
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+            "progress = CASE WHEN ? = 'succeeded' THEN 1 ELSE progress END "
+            "WHERE id = ? AND status = ?"
+        )
+        args = (status, json.dumps(result) if result is not None else None, error, _now(), status, job_id, from_status)
+        if owner is not None:
+            query, args = query + " AND owner = ?", args + (owner,)
+        with self._connect() as conn:
+            conn.execute(query, args)
+
+    def cancel(self, job_id: str):
+        """
+        Cancel a queued job outright, or flag a running one to stop at its
+        next progress checkpoint. Finished jobs are left alone. Returns the
+        job record, or None for an unknown job.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (_now(), job_id),
+            )
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def recover(self, job_ids=None):
+        """
+        Take back interrupted jobs: running jobs whose worker process on
+        this host is gone, or whose heartbeat is older than
+        HEARTBEAT_TIMEOUT (restricted to `job_ids` if given). They are
+        requeued, or cancelled if that was requested, or failed once they
+        were interrupted MAX_ATTEMPTS times. Jobs still running elsewhere
+        are left alone. Returns the ids of the requeued jobs.
+        """
+        if job_ids is not None and not job_ids:
+            return []
+        query, args = "SELECT id, owner, heartbeat_at FROM jobs WHERE status = 'running'", ()
+        if job_ids is not None:
+            query += f" AND id IN ({','.join('?' * len(job_ids))})"
+            args = tuple(job_ids)
+
+        requeued = []
+        now = time.time()
+        with self._connect() as conn:
+            for row in conn.execute(query, args).fetchall():
+                stale = row["heartbeat_at"] is None or now - row["heartbeat_at"] > HEARTBEAT_TIMEOUT
+                if not stale and _owner_alive(row["owner"]) is not False:
+                    continue
+                # Conditional on the owner and heartbeat read above, so a
+                # job that is still beating is never taken back
+                conn.execute(
+                    "UPDATE jobs SET "
+                    "status = CASE WHEN cancel_requested THEN 'cancelled' "
+                    "WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                    "error = CASE WHEN NOT cancel_requested AND attempts >= ? "
+                    "THEN 'interrupted too many times' END, "
+                    "finished_at = CASE WHEN cancel_requested OR attempts >= ? THEN ? END, "
+                    "owner = NULL, heartbeat_at = NULL "
+                    "WHERE id = ? AND status = 'running' AND owner IS ? AND heartbeat_at IS ?",
+                    (MAX_ATTEMPTS, MAX_ATTEMPTS, MAX_ATTEMPTS, _now(), row["id"], row["owner"], row["heartbeat_at"]),
+                )
+                status = conn.execute("SELECT status FROM jobs WHERE id = ?", (row["id"],)).fetchone()["status"]
+                if status == "queued":
+                    requeued.append(row["id"])
+        return requeued
+
+
+# ---------- JOB KINDS ----------
+
+def _slot(disease: str):
+    return MS_SLOT if disease == "ms" else GLP1_SLOT
+
+
+def _run_optimize(params, report):
+    with _slot(params["disease"]).pinned() as model:
+        outcome = optimize_batch([params])[0]
+    if "error" in outcome:
+        raise ValueError(outcome["error"])
+    return {"model_version": model.version, **outcome}
+
+
+def _run_batch(params, report):
+    items = params["items"]
+    results = []
+    with GLP1_SLOT.pinned() as glp1_model, MS_SLOT.pinned() as ms_model:
+        versions = {"glp1": glp1_model.version, "ms": ms_model.version}
+        for start in range(0, len(items), BATCH_CHUNK):
+            report(start / len(items), f"{start}/{len(items)} items")
+            chunk = items[start:start + BATCH_CHUNK]
+            for item, outcome in zip(chunk, optimize_batch(chunk)):
+                if "candidates" in outcome:
+                    outcome = {"model_version": versions["ms" if item["disease"] == "ms" else "glp1"], **outcome}
+                results.append({**item, **outcome})
+
+    return {
+        "n_items": len(results),
+        "n_errors": sum("error" in r for r in results),
+        "results": results,
+    }
+
+
+def _run_scan(params, report):
+    with _slot(params["disease"]).pinned() as model:
+        result = scan(params["disease"], params["starting_sequence"])
+    return {
+        "model_version": model.version,
+        "residues": result["residues"],
+        "start_score": result["start_score"],
+        "scores": result["scores"].tolist(),
+    }
+
+
+def _run_evolve(params, report):
+    def progress(done, generations):
+        report(done / generations, f"generation {done}/{generations}")
+
+    params = dict(params)
+    start_seq = params.pop("starting_sequence")
+    with MS_SLOT.pinned() as model:
+        candidates = evolve_for_ms(start_seq, **params, progress=progress)
+    return {"model_version": model.version, "candidates": candidates}
+
+
+# Runner per job kind: runner(params, report) -> JSON-serializable result
+RUNNERS = {
+    "optimize": _run_optimize,
+    "batch": _run_batch,
+    "scan": _run_scan,
+    "evolve": _run_evolve,
+}
+
+
+class _Reporter:
+    """
+    Progress checkpoint of a running job; raises JobCancelled once
+    cancellation is requested or the job was taken back from this worker.
+    """
+
+    def __init__(self, store, job_id, owner, interval=PROGRESS_INTERVAL):
+        self.store = store
+        self.job_id = job_id
+        self.owner = owner
+        self.interval = interval
+        self._last = None
+
+    def __call__(self, progress: float, message: str = None, force: bool = False):
+        now = time.monotonic()
+        if not force and self._last is not None and now - self._last < self.interval:
+            return
+        self._last = now
+        if self.store.set_progress(self.job_id, progress, self.owner, message):
+            raise JobCancelled()
+
+
+def _beat(store, job_id, owner, stop):
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        store.heartbeat(job_id, owner)
+
+
+def run_job(db_path: str, job_id: str):
+    """
+    Worker entry point: claim a queued job, run it and record the outcome.
+    Newly activated model versions are picked up before the job starts.
+    A background thread keeps the job's heartbeat fresh while it runs.
+    """
+    store = JobStore(db_path)
+    owner = worker_id()
+    claimed = store.claim(job_id, owner)
+    if claimed is None:
+        return
+    kind, params = claimed
+
+    stop = threading.Event()
+    threading.Thread(target=_beat, args=(store, job_id, owner, stop), daemon=True).start()
+    report = _Reporter(store, job_id, owner)
+    try:
+        reload_models()
+        report(0.0, "running", force=True)
+        result = RUNNERS[kind](params, report)
+        report(1.0, "done", force=True)
+    except JobCancelled:
+        store.finish(job_id, "cancelled", owner=owner)
+    except Exception as e:
+        store.finish(job_id, "failed", error=f"{type(e).__name__}: {e}", owner=owner)
+    else:
+        store.finish(job_id, "succeeded", result=result, owner=owner)
+    finally:
+        stop.set()
+
+
+# ---------- QUEUE ----------
+
+class JobQueue:
+    """
+    Runs stored jobs in a local pool of worker processes, so long jobs
+    never hold up interactive requests and at most `workers` run at once.
+
+    Job state lives only in the store: on start-up, queued jobs are
+    submitted, and every HEARTBEAT_TIMEOUT seconds jobs interrupted in any
+    process sharing the store (see JobStore.recover) are taken back and
+    resubmitted. When the pool breaks (a worker died), the job that was
+    running there is recovered the same way and unclaimed jobs are
+    resubmitted to a fresh pool with backoff, at most MAX_ATTEMPTS times.
+    """
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS):
+        self.store = store
+        self.workers = max(1, workers)
+        self._pool = None
+        self._futures = {}
+        self._resubmits = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        """Submit the queued jobs and start watching for interrupted ones; returns the submitted ids."""
+        self.store.recover()
+        job_ids = self.store.queued()
+        for job_id in job_ids:
+            self._submit(job_id)
+        threading.Thread(target=self._watch, name="job-recovery", daemon=True).start()
+        return job_ids
+
+    def _watch(self):
+        while not self._stop.wait(HEARTBEAT_TIMEOUT):
+            for job_id in self.store.recover():
+                self._submit(job_id)
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            if self._pool is not None:
+                # Unstarted jobs stay queued for the next start(); jobs
+                # already running are finished first
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def submit(self, kind: str, params) -> str:
+        job_id = self.store.create(kind, params)
+        self._submit(job_id)
+        return job_id
+
+    def cancel(self, job_id: str):
+        job = self.store.cancel(job_id)
+        future = self._futures.get(job_id)
+        if future is not None and job is not None and job["status"] == "cancelled":
+            future.cancel()
+        return job
+
+    def _new_pool(self):
+        # Spawned, not forked: the API process has threads (warm-up,
+        # model watcher) that may hold locks at fork time
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _submit(self, job_id: str):
+        with self._lock:
+            if self._stop.is_set():
+                return
+            if self._pool is None:
+                self._pool = self._new_pool()
+            pool = self._pool
+            future = pool.submit(run_job, self.store.path, job_id)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._done(job_id, pool, f))
+
+    def _done(self, job_id: str, pool, future):
+        self._futures.pop(job_id, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            self._resubmits.pop(job_id, None)
+            return
+
+        if isinstance(error, BrokenProcessPool):
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+
+        # A job running in the dead worker is requeued or failed like any
+        # interrupted job; a job it never claimed is still queued
+        self.store.recover([job_id])
+        job = self.store.get(job_id)
+        if job is None or job["status"] != "queued":
+            self._resubmits.pop(job_id, None)
+            return
+
+        resubmits = self._resubmits.get(job_id, 0) + 1
+        if resubmits > MAX_ATTEMPTS:
+            # Workers keep dying (e.g. they cannot even start): give up
+            self._resubmits.pop(job_id, None)
+            self.store.finish(job_id, "failed", error=f"worker pool failed {MAX_ATTEMPTS} times: "
+                              f"{type(error).__name__}: {error}", from_status="queued")
+            return
+        self._resubmits[job_id] = resubmits
+        timer = threading.Timer(RESUBMIT_BACKOFF * 2 ** (resubmits - 1), self._submit, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+
+    def stats(self):
+        return {"workers": self.workers, "in_flight": len(self._futures), "counts": self.store.counts()}
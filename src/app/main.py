@@ -1,16 +1,169 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+import io
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.background import BackgroundTask
 
 # Import optimization engines (package-relative)
-from ..optimization.optimize_glp1 import optimize_for_diabetes, optimize_for_obesity
+from ..optimization.optimize_glp1 import optimize_for_diabetes, optimize_for_obesity, optimize_pareto
 from ..optimization.optimize_ms import optimize_for_ms
+from ..optimization.optimize_batch import optimize_batch, validate_item
+from ..optimization.scan import scan, scan_to_csv
+from ..optimization.stream_optimize import stream_optimize
+from ..optimization.warmup import reload_models, warm_up
+from .admission import AdmissionController, Overloaded, SingleFlight
+from .cache import ResultCache
+from .jobs import STATUSES as JOB_STATUSES, JobQueue, JobStore
+
+# The optimization modules import each other as top-level `optimization.*`
+# (src/ is put on sys.path by optimize_glp1), so read metrics and the
+# model slots from those modules rather than from `src.optimization.*` copies.
+from optimization import metrics
+from optimization.score_glp1_sequence import MODEL_SLOT as GLP1_SLOT
+from optimization.score_ms_sequence import MODEL_SLOT as MS_SLOT
+
+
+# ---------- WARM-UP ----------
+
+# Readiness of this worker, reported by /ready
+READINESS = {"status": "starting", "timings": {}, "error": None, "total_seconds": None}
+
+
+def _warm_up_worker():
+    t0 = time.perf_counter()
+    try:
+        warm_up(READINESS["timings"])
+        READINESS["status"] = "ready"
+    except Exception as e:
+        READINESS["status"] = "failed"
+        READINESS["error"] = f"{type(e).__name__}: {e}"
+    READINESS["total_seconds"] = time.perf_counter() - t0
+
+
+# ---------- MODEL RELOAD ----------
+
+# Seconds between checks of the model registry for newly activated
+# versions (0 disables polling; POST /models/reload still works)
+MODEL_RELOAD_SECONDS = float(os.environ.get("PEPTIDE_MODEL_RELOAD_SECONDS", "30"))
+
+MODEL_RELOAD = {"last_check": None, "error": None}
+
+
+def _reload_models():
+    try:
+        versions = reload_models()
+        MODEL_RELOAD["error"] = None
+    except Exception as e:
+        # The previous versions keep serving
+        versions = None
+        MODEL_RELOAD["error"] = f"{type(e).__name__}: {e}"
+    MODEL_RELOAD["last_check"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    return versions
+
+
+def _model_watcher(stop: threading.Event):
+    while not stop.wait(MODEL_RELOAD_SECONDS):
+        if READINESS["status"] == "ready":
+            _reload_models()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so liveness (/) answers immediately while
+    # /ready keeps reporting 503 until models are loaded and exercised
+    threading.Thread(target=_warm_up_worker, name="warm-up", daemon=True).start()
+
+    stop = threading.Event()
+    if MODEL_RELOAD_SECONDS > 0:
+        threading.Thread(target=_model_watcher, args=(stop,), name="model-watcher", daemon=True).start()
+
+    # Pick up the jobs a previous process left queued or running
+    _job_queue().start()
+    yield
+    stop.set()
+    _job_queue().close()
+
 
 app = FastAPI(
     title="Peptide Optimization API",
     description="API for optimized peptide design for Diabetes, Obesity, and Multiple Sclerosis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Results are cached per (disease, sequence, max_mutations, model version)
+# at a depth of at least CACHE_MIN_DEPTH, so smaller top_k values are
+# served by slicing the cached ranking.
+RESULT_CACHE = ResultCache(max_entries=1024, ttl_seconds=3600)
+CACHE_MIN_DEPTH = 10
+
+# Long-running work submitted through /jobs runs in worker processes; the
+# queue and its database are created on first use, not at import time
+JOB_QUEUE = None
+_JOB_QUEUE_LOCK = threading.Lock()
+
+
+def _job_queue():
+    global JOB_QUEUE
+    if JOB_QUEUE is None:
+        with _JOB_QUEUE_LOCK:
+            if JOB_QUEUE is None:
+                JOB_QUEUE = JobQueue(JobStore())
+    return JOB_QUEUE
+
+# Optimizations computed at once by this process (default: one per CPU,
+# 0 = unlimited), how many more may wait for a slot, and for how long,
+# before requests are turned away with 429
+MAX_CONCURRENT = int(os.environ.get("PEPTIDE_MAX_CONCURRENT", str(os.cpu_count() or 1)))
+MAX_QUEUE = int(os.environ.get("PEPTIDE_MAX_QUEUE", str(2 * max(1, MAX_CONCURRENT))))
+QUEUE_TIMEOUT = float(os.environ.get("PEPTIDE_QUEUE_TIMEOUT", "5"))
+RETRY_AFTER_SECONDS = 1
+
+ADMISSION = AdmissionController(MAX_CONCURRENT, MAX_QUEUE, QUEUE_TIMEOUT)
+
+# Identical /optimize requests arriving together share one computation
+IN_FLIGHT = SingleFlight()
+
+
+# ---------- METRICS ----------
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """Request latency histogram plus a Server-Timing header with per-stage durations."""
+    if not metrics.enabled():
+        return await call_next(request)
+
+    token = metrics.start_request()
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        timings = metrics.finish_request(token)
+    elapsed = time.perf_counter() - t0
+
+    route = request.scope.get("route")
+    metrics.observe(
+        "peptide_http_request_duration_seconds", elapsed,
+        request.method, getattr(route, "path", "<unmatched>"), str(response.status_code),
+    )
+    # Streaming bodies are produced after the headers are sent, so their
+    # stages only show up in /metrics
+    response.headers["Server-Timing"] = metrics.server_timing_header(timings, total=elapsed)
+    return response
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse({"error": str(exc)}, status_code=429, headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
 
 # ---------- REQUEST MODELS ----------
 
@@ -18,6 +171,139 @@ class OptimizeRequest(BaseModel):
     disease: str               # "diabetes" | "obesity" | "ms"
     starting_sequence: str     # peptide sequence (one-letter code)
     top_k: int = 5             # number of candidates to return
+    max_mutations: int = 1     # GLP-1 only: substitutions per candidate
+    objective: str = "potency" # "potency" | "pareto" (GLP-1 potency vs. SCTR selectivity)
+
+
+class BatchOptimizeRequest(BaseModel):
+    items: List[OptimizeRequest]
+    return_errors: bool = True  # report per-item errors instead of failing the batch
+
+
+class StreamOptimizeRequest(BaseModel):
+    disease: str               # "diabetes" | "obesity" | "ms"
+    starting_sequence: str     # peptide sequence (one-letter code)
+    top_k: int = 5             # number of candidates to return
+    chunk_size: int = 256      # candidates scored between progress events
+    format: str = "ndjson"     # "ndjson" | "sse"
+
+
+class ScanRequest(BaseModel):
+    disease: str               # "diabetes" | "obesity" | "ms"
+    starting_sequence: str     # peptide sequence (one-letter code)
+    format: str = "json"       # "json" | "npy" | "csv"
+
+
+class EvolveRequest(BaseModel):
+    starting_sequence: str     # peptide sequence (one-letter code), MS only
+    top_k: int = 5             # number of candidates to return
+    method: str = "ga"         # "ga" | "anneal"
+    generations: int = 50
+    population_size: int = 200
+    seed: int = 0
+    time_budget: float = None  # seconds; stops early between generations
+
+
+class JobRequest(BaseModel):
+    kind: str                  # "optimize" | "batch" | "scan" | "evolve"
+    params: dict               # body of the matching request (see JOB_KINDS)
+
+
+# Request model per job kind
+JOB_KINDS = {
+    "optimize": OptimizeRequest,
+    "batch": BatchOptimizeRequest,
+    "scan": ScanRequest,
+    "evolve": EvolveRequest,
+}
+
+
+# ---------- CACHING ----------
+
+def _normalize_sequence(seq: str) -> str:
+    return seq.strip().upper()
+
+
+def _cache_key(disease: str, seq: str, max_mutations: int, model_version: str, objective: str = "potency"):
+    # Keying on the model version invalidates entries when a new one is served
+    return (disease, seq, max_mutations, model_version, objective)
+
+
+def _slot(disease: str):
+    return MS_SLOT if disease == "ms" else GLP1_SLOT
+
+
+def _pinned_events(events, slot, snapshot):
+    """
+    Produce stream events with `snapshot` pinned. Each step may run on a
+    different worker thread, so the model is pinned around every step.
+    """
+    while True:
+        with slot.pin(snapshot):
+            event = next(events, None)
+        if event is None:
+            return
+        yield event
+
+
+def _optimize_item(req: OptimizeRequest):
+    return {
+        "disease": req.disease.lower(),
+        "starting_sequence": _normalize_sequence(req.starting_sequence),
+        "top_k": req.top_k,
+        "max_mutations": req.max_mutations,
+        "objective": req.objective,
+    }
+
+
+def _job_params(kind: str, params: dict):
+    """(normalized params, None) for a valid job submission, else (None, error)."""
+    if kind not in JOB_KINDS:
+        return None, f"Unknown job kind: {kind}"
+    try:
+        req = JOB_KINDS[kind](**params)
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+    if kind == "optimize":
+        item = _optimize_item(req)
+        return item, validate_item(item["disease"], item["max_mutations"], item["top_k"], item["objective"])
+    if kind == "batch":
+        # Invalid items are reported per item in the job result, as in /optimize/batch
+        items = [_optimize_item(item) for item in req.items]
+        return {"items": items}, None if items else "items must not be empty"
+
+    seq = _normalize_sequence(req.starting_sequence)
+    if not seq:
+        return None, "starting_sequence must not be empty"
+    if kind == "scan":
+        disease = req.disease.lower()
+        return {"disease": disease, "starting_sequence": seq}, validate_item(disease)
+
+    if req.method not in ("ga", "anneal"):
+        return None, f"Unknown method: {req.method}"
+    if min(req.top_k, req.generations, req.population_size) < 1:
+        return None, "top_k, generations and population_size must be at least 1"
+    return {
+        "starting_sequence": seq,
+        "top_k": req.top_k,
+        "method": req.method,
+        "generations": req.generations,
+        "population_size": req.population_size,
+        "seed": req.seed,
+        "time_budget": req.time_budget,
+    }, None
+
+
+def _run_optimizer(disease: str, seq: str, top_k: int, max_mutations: int, objective: str = "potency"):
+    if objective == "pareto":
+        return optimize_pareto(seq, top_k, max_mutations)
+    elif disease == "diabetes":
+        return optimize_for_diabetes(seq, top_k, max_mutations)
+    elif disease == "obesity":
+        return optimize_for_obesity(seq, top_k, max_mutations)
+    else:
+        return optimize_for_ms(seq, top_k)
 
 
 # ---------- ROUTES ----------
@@ -27,25 +313,281 @@ def root():
     return {"message": "Peptide Optimization API is running."}
 
 
+@app.get("/ready")
+def ready():
+    body = {**READINESS, "timings": dict(READINESS["timings"])}
+    return JSONResponse(body, status_code=200 if READINESS["status"] == "ready" else 503)
+
+
 @app.post("/optimize")
 def optimize(req: OptimizeRequest):
     disease = req.disease.lower()
 
-    if disease == "diabetes":
-        result = optimize_for_diabetes(req.starting_sequence, req.top_k)
+    error = validate_item(disease, req.max_mutations, req.top_k, req.objective)
+    if error is not None:
+        return JSONResponse({"error": error}, status_code=400)
 
-    elif disease == "obesity":
-        result = optimize_for_obesity(req.starting_sequence, req.top_k)
+    seq = _normalize_sequence(req.starting_sequence)
 
-    elif disease == "ms":
-        result = optimize_for_ms(req.starting_sequence, req.top_k)
+    # The whole request is served by one model version, even if a newer
+    # one is swapped in meanwhile
+    with _slot(disease).pinned() as model:
+        key = _cache_key(disease, seq, req.max_mutations, model.version, req.objective)
 
-    else:
-        return {"error": f"Unknown disease type: {req.disease}"}
+        result = RESULT_CACHE.get(key, req.top_k)
+        cached = result is not None
+        coalesced = False
+        if not cached:
+            depth = max(req.top_k, CACHE_MIN_DEPTH)
+
+            def compute():
+                with ADMISSION.slot():
+                    ranked = _run_optimizer(disease, seq, depth, req.max_mutations, req.objective)
+                RESULT_CACHE.put(key, ranked, depth)
+                return ranked
+
+            ranked, coalesced = IN_FLIGHT.do((key, depth), compute)
+            result = ranked[:req.top_k]
 
     return {
         "disease": disease,
         "starting_sequence": req.starting_sequence,
         "top_k": req.top_k,
+        "max_mutations": req.max_mutations,
+        "objective": req.objective,
+        "model_version": model.version,
+        "cached": cached,
+        "coalesced": coalesced,
         "candidates": result
     }
+
+
+@app.post("/optimize/batch")
+def optimize_batch_route(req: BatchOptimizeRequest):
+    items = [
+        {
+            "disease": item.disease.lower(),
+            "starting_sequence": item.starting_sequence,
+            "top_k": item.top_k,
+            "max_mutations": item.max_mutations,
+            "objective": item.objective,
+        }
+        for item in req.items
+    ]
+
+    with GLP1_SLOT.pinned() as glp1_model, MS_SLOT.pinned() as ms_model:
+        versions = {"glp1": glp1_model.version, "ms": ms_model.version}
+
+        # Serve what we can from the cache; compute the rest in shared batches
+        outcomes = [None] * len(items)
+        todo, keys = [], {}
+        for i, item in enumerate(items):
+            if validate_item(item["disease"], item["max_mutations"], item["top_k"], item["objective"]) is None:
+                seq = _normalize_sequence(item["starting_sequence"])
+                version = versions["ms" if item["disease"] == "ms" else "glp1"]
+                keys[i] = _cache_key(item["disease"], seq, item["max_mutations"], version, item["objective"])
+                cached = RESULT_CACHE.get(keys[i], item["top_k"])
+                if cached is not None:
+                    outcomes[i] = {"model_version": version, "cached": True, "candidates": cached}
+                    continue
+                todo.append((i, {**item, "starting_sequence": seq,
+                                 "top_k": max(item["top_k"], CACHE_MIN_DEPTH)}))
+            else:
+                todo.append((i, item))
+
+        if todo:
+            with ADMISSION.slot():
+                computed = optimize_batch([it for _, it in todo])
+        else:
+            computed = []
+
+        for (i, batch_item), outcome in zip(todo, computed):
+            if "candidates" in outcome and i in keys:
+                RESULT_CACHE.put(keys[i], outcome["candidates"], batch_item["top_k"])
+                outcome = {
+                    "model_version": keys[i][3],
+                    "cached": False,
+                    "candidates": outcome["candidates"][:items[i]["top_k"]],
+                }
+            outcomes[i] = outcome
+
+    results = []
+    for item, outcome in zip(items, outcomes):
+        if "error" in outcome and not req.return_errors:
+            return JSONResponse({"error": f"Item {len(results)} failed: {outcome['error']}"}, status_code=400)
+        results.append({**item, **outcome})
+
+    return {
+        "n_items": len(results),
+        "n_errors": sum("error" in r for r in results),
+        "results": results,
+    }
+
+
+@app.post("/optimize/stream")
+def optimize_stream(req: StreamOptimizeRequest):
+    disease = req.disease.lower()
+
+    error = validate_item(disease, 1, req.top_k)
+    if error is None and req.format not in ("ndjson", "sse"):
+        error = f"Unknown stream format: {req.format}"
+    if error is not None:
+        return JSONResponse({"error": error}, status_code=400)
+
+    slot = _slot(disease)
+    model = slot.get()
+    # The slot is taken before the response starts, so a busy server still
+    # answers 429; it is freed when the stream ends or the client goes away
+    release = ADMISSION.reserve()
+
+    def admitted_events():
+        try:
+            for e in _pinned_events(
+                stream_optimize(disease, _normalize_sequence(req.starting_sequence), req.top_k, req.chunk_size),
+                slot, model,
+            ):
+                yield {**e, "model_version": model.version} if e["event"] == "result" else e
+        finally:
+            release()
+
+    events = admitted_events()
+    if req.format == "sse":
+        body = (f"event: {e['event']}\ndata: {json.dumps(e)}\n\n" for e in events)
+        return StreamingResponse(body, media_type="text/event-stream", background=BackgroundTask(release))
+
+    body = (json.dumps(e) + "\n" for e in events)
+    return StreamingResponse(body, media_type="application/x-ndjson", background=BackgroundTask(release))
+
+
+@app.post("/scan")
+def scan_route(req: ScanRequest):
+    """
+    Saturation-mutagenesis scan: the score of every single-point mutant as
+    an L x 20 matrix (rows = positions, columns = residues in `residues`).
+    "npy" returns the float64 matrix as a NumPy .npy file and "csv" one row
+    per position; their metadata is sent as X-* headers.
+    """
+    disease = req.disease.lower()
+
+    error = validate_item(disease)
+    if error is None and req.format not in ("json", "npy", "csv"):
+        error = f"Unknown scan format: {req.format}"
+    seq = _normalize_sequence(req.starting_sequence)
+    if error is None and not seq:
+        error = "starting_sequence must not be empty"
+    if error is not None:
+        return JSONResponse({"error": error}, status_code=400)
+
+    with _slot(disease).pinned() as model, ADMISSION.slot():
+        result = scan(disease, seq)
+
+    headers = {
+        "X-Model-Version": str(model.version),
+        "X-Residues": result["residues"],
+        "X-Start-Score": repr(result["start_score"]),
+    }
+    if req.format == "npy":
+        buf = io.BytesIO()
+        np.save(buf, result["scores"])
+        return Response(buf.getvalue(), media_type="application/octet-stream", headers=headers)
+    if req.format == "csv":
+        return Response(scan_to_csv(seq, result), media_type="text/csv", headers=headers)
+
+    return {
+        "disease": disease,
+        "starting_sequence": seq,
+        "model_version": model.version,
+        "residues": result["residues"],
+        "start_score": result["start_score"],
+        "scores": result["scores"].tolist(),
+    }
+
+
+@app.post("/jobs")
+def submit_job(req: JobRequest):
+    """
+    Queue a long-running optimization ("optimize", "batch", "scan" or MS
+    "evolve", with `params` as in the matching endpoint) to run in a
+    background worker. Poll GET /jobs/{id} for progress and the result.
+    """
+    params, error = _job_params(req.kind, req.params)
+    if error is not None:
+        return JSONResponse({"error": error}, status_code=400)
+    queue = _job_queue()
+    return queue.store.get(queue.submit(req.kind, params))
+
+
+@app.get("/jobs")
+def list_jobs(status: str = None, limit: int = 50):
+    if status is not None and status not in JOB_STATUSES:
+        return JSONResponse({"error": f"Unknown job status: {status}"}, status_code=400)
+    queue = _job_queue()
+    return {**queue.stats(), "jobs": queue.store.list(status, limit)}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = _job_queue().store.get(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Unknown job: {job_id}"}, status_code=404)
+    return job
+
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Cancel a queued job, or stop a running one at its next progress checkpoint."""
+    job = _job_queue().cancel(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Unknown job: {job_id}"}, status_code=404)
+    return job
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return RESULT_CACHE.stats()
+
+
+@app.get("/admission/stats")
+def admission_stats():
+    return {**ADMISSION.stats(), "single_flight": IN_FLIGHT.stats()}
+
+
+@app.get("/models")
+def models_route():
+    return {
+        "glp1": GLP1_SLOT.get().version,
+        "ms": MS_SLOT.get().version,
+        "reload_interval_seconds": MODEL_RELOAD_SECONDS,
+        **MODEL_RELOAD,
+    }
+
+
+@app.post("/models/reload")
+def models_reload():
+    """Swap in newly activated registry versions now; in-flight requests finish on the old ones."""
+    versions = _reload_models()
+    if versions is None:
+        return JSONResponse({"error": MODEL_RELOAD["error"]}, status_code=500)
+    return versions
+
+
+@app.get("/metrics")
+def metrics_route():
+    cache = RESULT_CACHE.stats()
+    admission = ADMISSION.stats()
+    jobs = _job_queue().store.counts()
+    body = metrics.render({
+        "peptide_result_cache_entries": ("gauge", "Entries in the result cache.", cache["entries"]),
+        "peptide_result_cache_hits_total": ("counter", "Result-cache hits.", cache["hits"]),
+        "peptide_result_cache_misses_total": ("counter", "Result-cache misses.", cache["misses"]),
+        "peptide_optimizations_running": ("gauge", "Optimizations being computed.", admission["running"]),
+        "peptide_optimizations_waiting": ("gauge", "Optimizations waiting for a slot.", admission["waiting"]),
+        "peptide_optimizations_rejected_total": (
+            "counter", "Optimizations turned away with 429.", admission["rejected"] + admission["timeouts"]),
+        "peptide_optimizations_coalesced_total": (
+            "counter", "Requests served by an identical in-flight optimization.", IN_FLIGHT.stats()["coalesced"]),
+        "peptide_jobs_queued": ("gauge", "Background jobs waiting for a worker.", jobs["queued"]),
+        "peptide_jobs_running": ("gauge", "Background jobs being run.", jobs["running"]),
+        "peptide_ready": ("gauge", "1 once warm-up has finished successfully.", READINESS["status"] == "ready"),
+    })
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
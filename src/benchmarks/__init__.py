@@ -0,0 +1,7 @@
+"""Benchmarks package init.
+
+Micro-benchmarks for candidate generation, featurization, scoring and
+ranking. Run `python src/benchmarks/run_benchmarks.py --help`.
+"""
+
+__all__ = []
@@ -0,0 +1,406 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Time scoring, not warm hits in the shared on-disk score cache; the
+# cached-scoring cases use their own temporary cache
+os.environ.setdefault("PEPTIDE_SCORE_CACHE", "0")
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_models import install_synthetic_models, load_real_models
+from models.ms_features import AMINO_ACIDS, ms_features, point_mutant_features
+from optimization.generate_glp1_candidates import generate_single_mutants, iter_single_mutations
+from optimization.optimize_batch import optimize_batch
+from optimization.optimize_glp1 import optimize_for_diabetes, optimize_pareto
+from optimization.optimize_ms import iter_ms_mutations, optimize_for_ms
+from optimization.parallel_scoring import ParallelScorer
+from optimization.ranking import non_dominated_sort, top_k_indices
+from optimization.score_cache import ScoreCache, cached_scores
+from optimization.scan import scan
+from optimization.score_glp1_sequence import (
+    BASE_GLP1,
+    extract_mutations,
+    mutant_codes,
+    score_sequences_for_diabetes,
+)
+from optimization.score_ms_sequence import score_ms_features, score_sequences_for_ms
+
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+
+# Entry points whose cold import time is tracked, and the heavy
+# dependencies they should not pull in at import time
+IMPORT_MODULES = ("optimization.optimize_glp1", "optimization.optimize_ms", "src.app.main")
+HEAVY_MODULES = ("pandas", "sklearn", "joblib")
+
+# A case is reported as a regression when its median time exceeds the
+# baseline's by more than this factor
+DEFAULT_THRESHOLD = 1.25
+
+# (full, quick) parameter grids
+GLP1_LENGTHS = ((10, 20, 30), (10, 30))
+MS_LENGTHS = ((10, 30, 100, 300), (10, 100))
+BATCH_SIZES = ((1, 100, 1000, 10000), (1, 100, 1000))
+MULTI_MUTATIONS = ((2, 3), (2,))
+BATCH_ITEMS = ((1, 10, 50), (1, 10))
+PARALLEL_ROWS = ((100000,), (20000,))
+
+
+# ---------- TIMING ----------
+
+def measure(fn, repeats=5, min_time=0.05):
+    """
+    Time `fn()` like timeit: calibrate the number of calls per repeat so
+    each repeat takes at least `min_time` seconds, then return per-call
+    seconds for each of `repeats` repeats.
+    """
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / number]
+    for _ in range(repeats - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return number, samples
+
+
+_IMPORT_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(elapsed, *[m for m in {heavy!r} if m in sys.modules])
+"""
+
+
+def measure_import(module, repeats=5):
+    """
+    Cold import time of `module`, each repeat in a fresh interpreter
+    started outside the repository. Returns (seconds per repeat, heavy
+    modules that were imported along the way).
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([SRC_DIR, ROOT_DIR])}
+    probe = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    samples, heavy = [], set()
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", probe], cwd=tempfile.gettempdir(), env=env,
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        samples.append(float(out[0]))
+        heavy.update(out[1:])
+    return samples, sorted(heavy)
+
+
+# ---------- INPUTS ----------
+
+def _random_peptides(rng, n, length):
+    alphabet = np.array(list(AMINO_ACIDS))
+    return ["".join(row) for row in rng.choice(alphabet, (n, length))]
+
+
+def _glp1_variants(rng, n, length=len(BASE_GLP1), n_mutations=3):
+    """Random variants of the first `length` residues of BASE_GLP1."""
+    alphabet = np.array(list(AMINO_ACIDS))
+    base = np.array(list(BASE_GLP1[:length]))
+    out = []
+    for _ in range(n):
+        seq = base.copy()
+        seq[rng.integers(length, size=n_mutations)] = rng.choice(alphabet, n_mutations)
+        out.append("".join(seq))
+    return out
+
+
+def _glp1_rows(rng, n):
+    residues = list(AMINO_ACIDS) + ["Aib", "Y+HLE"]
+    return pd.DataFrame({
+        "Position": rng.integers(1, len(BASE_GLP1) + 1, n),
+        "Substitution": rng.choice(residues, n),
+    })
+
+
+# ---------- CASES ----------
+
+def build_cases(models, quick=False, seed=0):
+    """
+    Return (group, name, params, n_items, fn) tuples. Inputs are built
+    here, outside the timed calls.
+    """
+    q = 1 if quick else 0
+    rng = np.random.default_rng(seed)
+    encoder = models["glp1_encoder"]
+    glp1_model = models["glp1_model"]
+    ms_model = models["ms_model"]
+    cases = []
+
+    def add(group, name, params, n_items, fn):
+        cases.append((group, name, params, n_items, fn))
+
+    # Candidate generation
+    for length in GLP1_LENGTHS[q]:
+        seq = BASE_GLP1[:length]
+        n = sum(1 for _ in iter_single_mutations(seq))
+        add("generation", "glp1_single_mutations", {"length": length}, n,
+            lambda seq=seq: list(iter_single_mutations(seq)))
+        add("generation", "glp1_single_mutant_dicts", {"length": length}, n,
+            lambda seq=seq: generate_single_mutants(seq))
+    for length in MS_LENGTHS[q]:
+        seq = _random_peptides(rng, 1, length)[0]
+        add("generation", "ms_single_mutations", {"length": length}, 19 * length,
+            lambda seq=seq: list(iter_ms_mutations(seq)))
+
+    # Featurization
+    for n in BATCH_SIZES[q]:
+        seqs = _glp1_variants(rng, n)
+        add("featurization", "extract_mutations", {"n": n}, n,
+            lambda seqs=seqs: [extract_mutations(s) for s in seqs])
+        df = _glp1_rows(rng, n)
+        add("featurization", "glp1_encoder_transform", {"n": n}, n,
+            lambda df=df: encoder.transform(df))
+        peptides = _random_peptides(rng, n, 30)
+        add("featurization", "ms_features", {"n": n, "length": 30}, n,
+            lambda peptides=peptides: ms_features(peptides))
+    for length in GLP1_LENGTHS[q]:
+        seq = BASE_GLP1[:length]
+        mutations = list(iter_single_mutations(seq))
+        add("featurization", "glp1_mutant_codes", {"length": length}, len(mutations),
+            lambda seq=seq, mutations=mutations: mutant_codes(seq, mutations))
+    for length in MS_LENGTHS[q]:
+        seq = _random_peptides(rng, 1, length)[0]
+        add("featurization", "ms_point_mutant_features", {"length": length}, 19 * length,
+            lambda seq=seq: point_mutant_features(seq))
+
+    # Inference, single (batch=1) and batched
+    for n in BATCH_SIZES[q]:
+        X = encoder.transform(_glp1_rows(rng, n))
+        add("inference", "glp1_model_predict", {"batch": n}, n,
+            lambda X=X: glp1_model.predict(X))
+        seqs = _glp1_variants(rng, n)
+        add("inference", "glp1_score_sequences", {"batch": n}, n,
+            lambda seqs=seqs: score_sequences_for_diabetes(seqs))
+        X = ms_features(_random_peptides(rng, n, 30))
+        add("inference", "ms_model_predict_proba", {"batch": n}, n,
+            lambda X=X: ms_model.predict_proba(X))
+        peptides = _random_peptides(rng, n, 30)
+        add("inference", "ms_score_sequences", {"batch": n}, n,
+            lambda peptides=peptides: score_sequences_for_ms(peptides))
+
+    # Large candidate sets: in-process vs. the shared-memory process pool
+    workers = os.cpu_count() or 1
+    scorer = ParallelScorer(workers, min_rows=0)
+    for n in PARALLEL_ROWS[q]:
+        X = ms_features(_random_peptides(rng, n, 30))
+        add("inference", "ms_score_features", {"rows": n}, n,
+            lambda X=X: score_ms_features(X))
+        add("inference", "ms_score_features_parallel", {"rows": n, "workers": workers}, n,
+            lambda X=X: scorer.score_ms_features(X))
+
+    # Point-mutant feature rows: every row scored vs. distinct rows only
+    # vs. distinct rows served from a warm on-disk score cache
+    score_cache = ScoreCache(os.path.join(tempfile.mkdtemp(prefix="score_cache_"), "scores.sqlite3"))
+    for length in MS_LENGTHS[q]:
+        _, _, X = point_mutant_features(_random_peptides(rng, 1, length)[0])
+        add("inference", "ms_score_mutants", {"length": length}, len(X),
+            lambda X=X: score_ms_features(X))
+        add("inference", "ms_score_mutants_dedup", {"length": length}, len(X),
+            lambda X=X: cached_scores(X, score_ms_features))
+        cached_scores(X, score_ms_features, "bench", score_cache)
+        add("inference", "ms_score_mutants_cached", {"length": length}, len(X),
+            lambda X=X: cached_scores(X, score_ms_features, "bench", score_cache))
+
+    # Ranking
+    for n in BATCH_SIZES[q]:
+        scores = rng.normal(size=n).round(2)  # rounded, so ties occur
+        add("ranking", "top_k_indices", {"n": n, "k": 5}, n,
+            lambda scores=scores: top_k_indices(scores, 5))
+        objectives = rng.normal(size=(n, 2)).round(2)
+        add("ranking", "non_dominated_sort", {"n": n}, n,
+            lambda objectives=objectives: non_dominated_sort(objectives))
+
+    # End-to-end optimization
+    for length in GLP1_LENGTHS[q]:
+        seq = BASE_GLP1[:length]
+        add("optimize", "diabetes_single", {"length": length}, 1,
+            lambda seq=seq: optimize_for_diabetes(seq, 5))
+    for max_mutations in MULTI_MUTATIONS[q]:
+        add("optimize", "diabetes_multi", {"max_mutations": max_mutations}, 1,
+            lambda m=max_mutations: optimize_for_diabetes(BASE_GLP1, 5, max_mutations=m))
+    for max_mutations in (1,) + MULTI_MUTATIONS[q]:
+        add("optimize", "pareto", {"max_mutations": max_mutations}, 1,
+            lambda m=max_mutations: optimize_pareto(BASE_GLP1, 5, max_mutations=m))
+    for length in MS_LENGTHS[q]:
+        seq = _random_peptides(rng, 1, length)[0]
+        add("optimize", "ms_single", {"length": length}, 1,
+            lambda seq=seq: optimize_for_ms(seq, 5))
+    for length in GLP1_LENGTHS[q]:
+        seq = BASE_GLP1[:length]
+        add("optimize", "scan_diabetes", {"length": length}, 1,
+            lambda seq=seq: scan("diabetes", seq))
+    for length in MS_LENGTHS[q]:
+        seq = _random_peptides(rng, 1, length)[0]
+        add("optimize", "scan_ms", {"length": length}, 1,
+            lambda seq=seq: scan("ms", seq))
+    for n in BATCH_ITEMS[q]:
+        items = [
+            {"disease": ("diabetes", "obesity", "ms")[i % 3],
+             "starting_sequence": _glp1_variants(rng, 1)[0] if i % 3 < 2 else _random_peptides(rng, 1, 30)[0],
+             "top_k": 5}
+            for i in range(n)
+        ]
+        add("optimize", "batch", {"items": n}, n,
+            lambda items=items: optimize_batch(items))
+
+    return cases
+
+
+def case_id(group, name, params):
+    args = ",".join(f"{k}={v}" for k, v in params.items())
+    return f"{group}.{name}[{args}]"
+
+
+# ---------- RUN / COMPARE ----------
+
+def _result(cid, group, name, params, n_items, number, samples):
+    median = statistics.median(samples)
+    print(f"{cid:<60} {median * 1e3:10.3f} ms  ({number} x {len(samples)})")
+    return {
+        "id": cid,
+        "group": group,
+        "name": name,
+        "params": params,
+        "n_items": n_items,
+        "number": number,
+        "repeats": len(samples),
+        "best_s": min(samples),
+        "median_s": median,
+        "mean_s": statistics.fmean(samples),
+        "per_item_s": median / n_items if n_items else None,
+    }
+
+
+def run(models, mode, quick=False, repeats=5, min_time=0.05, pattern=None, seed=0):
+    results = []
+    for module in IMPORT_MODULES:
+        cid = case_id("import", module, {})
+        if pattern and pattern not in cid:
+            continue
+
+        samples, heavy = measure_import(module, repeats)
+        results.append({**_result(cid, "import", module, {}, 1, 1, samples), "heavy_modules": heavy})
+        if heavy:
+            print(f"  warning: importing {module} also imports {', '.join(heavy)}")
+
+    for group, name, params, n_items, fn in build_cases(models, quick, seed):
+        cid = case_id(group, name, params)
+        if pattern and pattern not in cid:
+            continue
+
+        number, samples = measure(fn, repeats, min_time)
+        results.append(_result(cid, group, name, params, n_items, number, samples))
+
+    import sklearn
+    meta = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "models": mode,
+        "quick": quick,
+        "seed": seed,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare median times by case id. Returns (rows, regressions), where
+    each row is (id, baseline_s, current_s, ratio).
+    """
+    base = {r["id"]: r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        b = base.get(r["id"])
+        if b is None:
+            continue
+        rows.append((r["id"], b["median_s"], r["median_s"], r["median_s"] / b["median_s"]))
+    regressions = [row for row in rows if row[3] > threshold]
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peptide optimizer micro-benchmarks")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown factor reported as a regression (default %(default)s)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit with status 1 when any case regresses")
+    parser.add_argument("--models", choices=("auto", "real", "synthetic"), default="auto",
+                        help="trained artifacts, synthetic models, or real when available")
+    parser.add_argument("--quick", action="store_true", help="smaller parameter grid")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="minimum seconds per repeat (calls are batched up to it)")
+    parser.add_argument("--filter", help="only run cases whose id contains this string")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    models, mode = None, "synthetic"
+    if args.models != "synthetic":
+        models, mode = load_real_models(), "real"
+        if models is None:
+            if args.models == "real":
+                raise SystemExit("Trained model artifacts not found in data/processed/")
+            print("Trained model artifacts not found; using synthetic models.")
+    if models is None:
+        models, mode = install_synthetic_models(args.seed), "synthetic"
+
+    current = run(models, mode, args.quick, args.repeats, args.min_time, args.filter, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"Saved {len(current['results'])} results → {args.output}")
+
+    if not args.baseline:
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("models") != mode:
+        print(f"Warning: baseline used {baseline['meta'].get('models')} models, this run used {mode}")
+
+    rows, regressions = compare(current, baseline, args.threshold)
+    print(f"\nCompared {len(rows)} cases against {args.baseline}:")
+    for cid, base_s, cur_s, ratio in rows:
+        flag = "  REGRESSION" if ratio > args.threshold else ""
+        print(f"{cid:<60} {base_s * 1e3:10.3f} → {cur_s * 1e3:10.3f} ms  ({ratio:.2f}x){flag}")
+
+    if regressions and args.fail_on_regression:
+        raise SystemExit(f"{len(regressions)} case(s) slower than {args.threshold}x the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from models.compiled_forest import CompiledForest
+from models.features_glp1 import GLP1FeatureEncoder
+from models.ms_features import AMINO_ACIDS, ms_features
+from optimization import score_glp1_sequence, score_ms_sequence
+
+# Same forest sizes as the training scripts, so inference costs are comparable
+N_ESTIMATORS = 300
+
+
+def _synthetic_effects(seed: int):
+    """
+    Synthetic (position, substitution) rows and an additive target:
+    every residue at every position of BASE_GLP1, plus a few
+    non-standard substitutions seen in the real dataset.
+    """
+    rng = np.random.default_rng(seed)
+    residues = list(AMINO_ACIDS) + ["Aib", "Y+HLE"]
+    L = len(score_glp1_sequence.BASE_GLP1)
+
+    df = pd.DataFrame(
+        [(pos, sub) for pos in range(1, L + 1) for sub in residues for _ in range(3)],
+        columns=["Position", "Substitution"],
+    )
+    residue_effect = dict(zip(residues, rng.normal(0.0, 1.0, len(residues))))
+    y = (
+        df["Substitution"].map(residue_effect).to_numpy() * (1.0 - df["Position"].to_numpy() / L)
+        + rng.normal(0.0, 0.3, len(df))
+    )
+    return df, y
+
+
+def make_glp1_models(seed: int = 0):
+    """Encoder + RandomForestRegressor fitted on synthetic potency effects."""
+    df, y = _synthetic_effects(seed)
+    encoder = GLP1FeatureEncoder()
+    X = encoder.fit_transform(df)
+    model = RandomForestRegressor(n_estimators=N_ESTIMATORS, random_state=seed)
+    model.fit(X, y)
+    return encoder, model
+
+
+def make_sctr_model(encoder, seed: int = 0):
+    """RandomForestRegressor fitted on synthetic SCTR penalties, for `encoder`."""
+    df, y = _synthetic_effects(seed + 1)
+    model = RandomForestRegressor(n_estimators=N_ESTIMATORS, random_state=seed)
+    model.fit(encoder.transform(df), y)
+    return model
+
+
+def make_ms_model(n_peptides: int = 500, seed: int = 0):
+    """
+    RandomForestClassifier fitted on random peptides labelled MS-like
+    when they are rich in A/E/K/Y (the glatiramer residues).
+    """
+    rng = np.random.default_rng(seed)
+    alphabet = np.array(list(AMINO_ACIDS))
+    glatiramer = np.array(list("AEKY"))
+
+    seqs, labels = [], []
+    for i in range(n_peptides):
+        length = int(rng.integers(8, 60))
+        if i % 2:
+            seq = rng.choice(glatiramer, length)
+            seq[rng.random(length) < 0.3] = rng.choice(alphabet, 1)
+        else:
+            seq = rng.choice(alphabet, length)
+        seqs.append("".join(seq))
+        labels.append(i % 2)
+
+    model = RandomForestClassifier(n_estimators=N_ESTIMATORS, random_state=seed)
+    model.fit(ms_features(seqs), np.array(labels))
+    return model
+
+
+def install_synthetic_models(seed: int = 0):
+    """
+    Train the synthetic models and install them in the scoring modules'
+    model slots, so the serving code paths run unchanged without
+    any artifacts on disk. Forests are compiled, as the serving path
+    prefers compiled forests when they are exported.
+    """
+    encoder, glp1_model = make_glp1_models(seed)
+    glp1_model = CompiledForest.from_sklearn(glp1_model)
+    sctr_model = CompiledForest.from_sklearn(make_sctr_model(encoder, seed))
+    score_glp1_sequence.install_model(encoder, glp1_model, version="synthetic", sctr_model=sctr_model)
+
+    ms_model = CompiledForest.from_sklearn(make_ms_model(seed=seed))
+    score_ms_sequence.install_model(ms_model, version="synthetic")
+
+    return {"glp1_encoder": encoder, "glp1_model": glp1_model, "ms_model": ms_model}
+
+
+def load_real_models():
+    """Load the trained artifacts through the serving path, or None if any is missing."""
+    encoder, glp1_model = score_glp1_sequence._load_encoder_and_model()
+    ms_model = score_ms_sequence._load_model_ms()
+    if encoder is None or glp1_model is None or ms_model is None:
+        return None
+
+    return {"glp1_encoder": encoder, "glp1_model": glp1_model, "ms_model": ms_model}
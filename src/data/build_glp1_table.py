@@ -1,31 +1,27 @@
-import pandas as pd
-import os
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-def main():
-    # Paths
-    raw_path = "data/raw/GLP1R_complete_approx.xlsx"
-    out_path = "data/processed/glp1_substitutions_effects.csv"
+import pandas as pd
 
-    # Load Excel
-    xls = pd.ExcelFile(raw_path)
+from data.sheet_cache import read_sheets
 
-    # Function to load a sheet into unified format
-    def load_sheet(sheet_name):
-        df = pd.read_excel(xls, sheet_name)
+RAW_PATH = "data/raw/GLP1R_complete_approx.xlsx"
+OUT_PATH = "data/processed/glp1_substitutions_effects.csv"
 
-        # Sheets already follow: Position | Substitution | Endpoint | Approx_Value
-        # So we simply return them
-        return df[["Position", "Substitution", "Endpoint", "Approx_Value"]]
 
-    # Load all substitution-effect sheets
+def main(raw_path: str = RAW_PATH, out_path: str = OUT_PATH):
+    # Load all substitution-effect sheets (parsed once into a columnar
+    # cache, re-parsed only when the workbook changes)
     sheets = [
         "Fig3_DialIn_Approx",
         "Fig4_DMS_Approx",
         "Fig5_Glu_HLE_Approx",
         "Fig6_FineTune_Approx",
     ]
+    frames = read_sheets(raw_path, sheets)
 
-    dfs = [load_sheet(s) for s in sheets]
+    # Sheets already follow: Position | Substitution | Endpoint | Approx_Value
+    dfs = [frames[s][["Position", "Substitution", "Endpoint", "Approx_Value"]] for s in sheets]
 
     # Combine into one dataframe
     df_all = pd.concat(dfs, ignore_index=True)
@@ -39,7 +35,7 @@ def main():
     ).reset_index()
 
     # Ensure output folder exists
-    os.makedirs("data/processed", exist_ok=True)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
 
     # Save CSV
     df_pivot.to_csv(out_path, index=False)
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+CACHE_ROOT = "data/processed/sheet_cache"
+
+
+def columnar_format():
+    """Parquet when pyarrow is installed, else pandas' pickle format."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "pickle"
+    return "parquet"
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_dir_for(workbook_path):
+    stem = os.path.splitext(os.path.basename(workbook_path))[0]
+    return os.path.join(CACHE_ROOT, stem)
+
+
+def _sheet_file(sheet_name, fmt):
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", sheet_name).strip("_") or "sheet"
+    return f"{safe}.{'parquet' if fmt == 'parquet' else 'pkl'}"
+
+
+def _write_frame(df, path, fmt):
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, path)
+
+
+def _read_frame(path, fmt):
+    return pd.read_parquet(path) if fmt == "parquet" else pd.read_pickle(path)
+
+
+def _convert_sheet(workbook_path, sheet_name, out_path, fmt):
+    """Worker: parse one sheet and write it to the columnar cache."""
+    _write_frame(pd.read_excel(workbook_path, sheet_name=sheet_name), out_path, fmt)
+
+
+def _load_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, "manifest.json")) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _save_manifest(cache_dir, manifest):
+    path = os.path.join(cache_dir, "manifest.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _current_manifest(workbook_path, cache_dir, fmt):
+    """
+    The cache manifest if it still describes `workbook_path`, else a fresh
+    empty one. A changed size/mtime only invalidates the cache when the
+    workbook's content hash changed too (e.g. not after a plain copy).
+    """
+    st = os.stat(workbook_path)
+    manifest = _load_manifest(cache_dir)
+    if manifest is not None and manifest.get("format") == fmt:
+        if (manifest["size"], manifest["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+            return manifest
+        sha = _sha256(workbook_path)
+        if manifest["sha256"] == sha:
+            manifest.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            _save_manifest(cache_dir, manifest)
+            return manifest
+    else:
+        sha = _sha256(workbook_path)
+
+    return {
+        "workbook": os.path.basename(workbook_path),
+        "sha256": sha,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "format": fmt,
+        "sheets": {},
+    }
+
+
+def read_sheets(workbook_path, sheet_names, cache_dir=None, max_workers=None):
+    """
+    Read sheets of an Excel workbook through a columnar cache.
+
+    Each sheet is converted once to a Parquet (or pickle) file under
+    data/processed/sheet_cache/<workbook>/, recorded in a manifest with the
+    workbook's size, mtime and sha256. Later calls read the cached files
+    while the workbook is unchanged. Sheets missing from the cache are
+    parsed in parallel worker processes.
+
+    Returns {sheet name: DataFrame}.
+    """
+    fmt = columnar_format()
+    cache_dir = cache_dir or _cache_dir_for(workbook_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    manifest = _current_manifest(workbook_path, cache_dir, fmt)
+    paths = {s: os.path.join(cache_dir, _sheet_file(s, fmt)) for s in sheet_names}
+    missing = [
+        s for s in sheet_names
+        if manifest["sheets"].get(s) != os.path.basename(paths[s]) or not os.path.exists(paths[s])
+    ]
+
+    if missing:
+        if len(missing) == 1 or max_workers == 1:
+            for s in missing:
+                _convert_sheet(workbook_path, s, paths[s], fmt)
+        else:
+            workers = min(len(missing), max_workers or os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_convert_sheet, workbook_path, s, paths[s], fmt) for s in missing
+                ]
+                for future in futures:
+                    future.result()
+
+        manifest["sheets"].update({s: os.path.basename(paths[s]) for s in missing})
+        _save_manifest(cache_dir, manifest)
+
+    return {s: _read_frame(paths[s], fmt) for s in sheet_names}
@@ -0,0 +1,218 @@
+import logging
+import os
+
+import numpy as np
+
+from models.pipeline import file_digest
+
+logger = logging.getLogger(__name__)
+
+# Rows per traversal chunk; bounds the (rows x trees) working arrays
+_CHUNK_ROWS = 1024
+
+
+class CompiledForest:
+    """
+    A trained scikit-learn random forest flattened into packed NumPy arrays.
+
+    All trees share one set of node arrays (feature, threshold, left,
+    right, value); `roots` holds each tree's root node. Leaves point to
+    themselves, so a batch is evaluated by stepping every (sample, tree)
+    pair down one level at a time for `max_depth` steps, with no Python
+    work per tree or per sample. Inference needs NumPy only.
+    """
+
+    def __init__(self, kind, feature, threshold, left, right, value, roots,
+                 max_depth, n_features, classes=None):
+        self.kind = kind  # "regressor" | "classifier"
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value  # [n_nodes, n_classes] (classifier) or [n_nodes, 1]
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.classes_ = classes
+        self.source_version = None
+        self._pack()
+
+    def _pack(self):
+        """Derive the compact arrays used by the traversal loop."""
+        # Children interleaved so one gather picks the next node:
+        # next = children[2 * node + goes_right]
+        self._children = np.stack([self.left, self.right], axis=1).ravel().astype(np.int32)
+        self._feature = self.feature.astype(np.int32)
+        self._roots = self.roots.astype(np.int32)
+
+        # Inputs are float32; rounding thresholds *down* to float32 keeps
+        # `x <= threshold` identical to the float64 comparison.
+        thr = self.threshold.astype(np.float32)
+        over = thr.astype(np.float64) > self.threshold
+        thr[over] = np.nextafter(thr[over], np.float32(-np.inf))
+        self._threshold = thr
+
+        # One contiguous row per output column for fast per-class gathers
+        self._value_t = np.ascontiguousarray(self.value.T)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Flatten a fitted RandomForestRegressor / RandomForestClassifier."""
+        is_classifier = hasattr(forest, "classes_")
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+
+        for est in forest.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            leaf = tree.children_left < 0
+            own = np.arange(offset, offset + n)
+
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, own, tree.children_left + offset))
+            rights.append(np.where(leaf, own, tree.children_right + offset))
+
+            value = tree.value[:, 0, :].astype(np.float64)
+            if is_classifier:
+                # Per-tree class probabilities (normalizing raw counts if needed)
+                totals = value.sum(axis=1, keepdims=True)
+                value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+            values.append(value)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            kind="classifier" if is_classifier else "regressor",
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            n_features=forest.n_features_in_,
+            classes=np.asarray(forest.classes_) if is_classifier else None,
+        )
+
+    # ---------- PERSISTENCE ----------
+
+    def save(self, path, source_version=None):
+        """Save as .npz; `source_version` records the artifact it was compiled from."""
+        np.savez_compressed(
+            path,
+            kind=np.array(self.kind),
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            max_depth=np.array(self.max_depth),
+            n_features=np.array(self.n_features),
+            classes=self.classes_ if self.classes_ is not None else np.array([]),
+            source_version=np.array(source_version or ""),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            kind = str(data["kind"])
+            forest = cls(
+                kind=kind,
+                feature=data["feature"].astype(np.intp),
+                threshold=data["threshold"],
+                left=data["left"].astype(np.intp),
+                right=data["right"].astype(np.intp),
+                value=data["value"],
+                roots=data["roots"].astype(np.intp),
+                max_depth=int(data["max_depth"]),
+                n_features=int(data["n_features"]),
+                classes=data["classes"] if kind == "classifier" else None,
+            )
+            forest.source_version = str(data["source_version"]) or None
+        return forest
+
+    # ---------- INFERENCE ----------
+
+    def _leaves(self, X):
+        """Leaf node index of every (sample, tree) pair: [n_samples, n_trees]."""
+        flat = X.ravel()
+        base = (np.arange(X.shape[0], dtype=np.int32) * X.shape[1])[:, None]
+        node = np.broadcast_to(self._roots, (X.shape[0], len(self._roots))).copy()
+        for _ in range(self.max_depth):
+            goes_right = flat[base + self._feature[node]] > self._threshold[node]
+            node = self._children[2 * node + goes_right]
+        return node
+
+    def _mean_value(self, X):
+        # scikit-learn evaluates trees on float32 inputs; match its splits exactly
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected X with {self.n_features} features, got shape {X.shape}")
+
+        out = np.empty((X.shape[0], self._value_t.shape[0]))
+        for start in range(0, X.shape[0], _CHUNK_ROWS):
+            leaves = self._leaves(X[start:start + _CHUNK_ROWS])
+            for c, column in enumerate(self._value_t):
+                out[start:start + len(leaves), c] = np.take(column, leaves).mean(axis=1)
+        return out
+
+    def predict_proba(self, X):
+        if self.kind != "classifier":
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._mean_value(X)
+
+    def predict(self, X):
+        mean = self._mean_value(X)
+        if self.kind == "classifier":
+            return self.classes_[mean.argmax(axis=1)]
+        return mean[:, 0]
+
+
+def artifact_fingerprint(path):
+    """
+    sha256 of a file's contents, or None if it is missing. Unlike size and
+    mtime, it survives a fresh checkout or a copy into the registry.
+    """
+    return file_digest(path)
+
+
+def compiled_path_for(model_path):
+    """model_x.pkl -> model_x.forest.npz (stored next to the pickle)."""
+    return os.path.splitext(model_path)[0] + ".forest.npz"
+
+
+def load_compiled_if_current(model_path):
+    """
+    Load the compiled forest exported from `model_path`, or return None
+    when it is missing, unreadable or was exported from a different
+    version of the pickle.
+    """
+    compiled_path = compiled_path_for(model_path)
+    source_version = artifact_fingerprint(model_path)
+    if source_version is None or not os.path.exists(compiled_path):
+        return None
+
+    try:
+        forest = CompiledForest.load(compiled_path)
+    except Exception as e:
+        logger.warning("Ignoring unreadable compiled forest %s (%s); loading %s instead",
+                       compiled_path, e, model_path)
+        return None
+
+    if forest.source_version != source_version:
+        logger.warning("Ignoring stale compiled forest %s: it was exported from a different %s; "
+                       "re-run models/export_forests.py", compiled_path, os.path.basename(model_path))
+        return None
+    return forest
+
+
+def export_forest(model, model_path):
+    """Compile `model` (loaded from `model_path`) and save it next to the pickle."""
+    forest = CompiledForest.from_sklearn(model)
+    forest.save(compiled_path_for(model_path), source_version=artifact_fingerprint(model_path))
+    return forest
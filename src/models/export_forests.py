@@ -0,0 +1,102 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from models.compiled_forest import CompiledForest, export_forest
+from models.ms_features import AMINO_ACIDS, ms_features_batch
+
+GLP1_ENCODER_PATH = "data/processed/glp1_encoder.pkl"
+GLP1_MODEL_PATH = "data/processed/model_glp1_diabetes_rf.pkl"
+GLP1_SCTR_MODEL_PATH = "data/processed/model_glp1_sctr_rf.pkl"
+MS_MODEL_PATH = "data/processed/model_ms_rf.pkl"
+MS_DATA_PATH = "data/raw/ms_peptides.csv"
+
+# Largest acceptable |sklearn - compiled| difference
+PARITY_TOLERANCE = 1e-9
+
+
+def _glp1_inputs(encoder, n_random, rng):
+    """Every (position, residue) pair plus random positions/substitutions."""
+    residues = list(AMINO_ACIDS) + ["Aib", "Y+HLE"]
+    rows = [(pos, sub) for pos in range(1, 31) for sub in residues]
+    rows += list(zip(rng.integers(1, 31, n_random), rng.choice(residues, n_random)))
+    return encoder.transform(pd.DataFrame(rows, columns=["Position", "Substitution"]))
+
+
+def _ms_inputs(n_random, rng):
+    """Training sequences plus random peptides of varied length."""
+    seqs = list(pd.read_csv(MS_DATA_PATH)["sequence"])
+    seqs += [
+        "".join(rng.choice(list(AMINO_ACIDS), rng.integers(5, 60)))
+        for _ in range(n_random)
+    ]
+    return ms_features_batch(seqs)
+
+
+def check_parity(model, forest: CompiledForest, X):
+    """Max absolute difference between sklearn and compiled outputs."""
+    if forest.kind == "classifier":
+        return float(np.abs(model.predict_proba(X) - forest.predict_proba(X)).max())
+    return float(np.abs(model.predict(X) - forest.predict(X)).max())
+
+
+def benchmark(model, forest: CompiledForest, X, sizes=(1, 19, 100, 1000, 10000), repeats=5):
+    """Best-of-`repeats` latency (seconds) of both engines per batch size."""
+    sk_call = model.predict_proba if forest.kind == "classifier" else model.predict
+    np_call = forest.predict_proba if forest.kind == "classifier" else forest.predict
+
+    rows = []
+    for n in sizes:
+        batch = X[np.arange(n) % len(X)]
+        timings = []
+        for call in (sk_call, np_call):
+            best = float("inf")
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                call(batch)
+                best = min(best, time.perf_counter() - t0)
+            timings.append(best)
+        rows.append({"batch": n, "sklearn_s": timings[0], "compiled_s": timings[1]})
+    return rows
+
+
+def main():
+    rng = np.random.default_rng(42)
+    ok = True
+
+    encoder = joblib.load(GLP1_ENCODER_PATH)
+    jobs = [
+        ("GLP-1 diabetes", GLP1_MODEL_PATH, lambda: _glp1_inputs(encoder, 5000, rng)),
+        ("MS", MS_MODEL_PATH, lambda: _ms_inputs(5000, rng)),
+    ]
+    # The SCTR (selectivity) model is optional
+    if os.path.exists(GLP1_SCTR_MODEL_PATH):
+        jobs.insert(1, ("GLP-1 SCTR", GLP1_SCTR_MODEL_PATH, lambda: _glp1_inputs(encoder, 5000, rng)))
+
+    for name, model_path, make_inputs in jobs:
+        model = joblib.load(model_path)
+        forest = export_forest(model, model_path)
+        print(f"Exported {name} forest → {model_path.replace('.pkl', '.forest.npz')} "
+              f"({len(forest.feature)} nodes, depth {forest.max_depth})")
+
+        X = make_inputs()
+        diff = check_parity(model, forest, X)
+        ok &= diff <= PARITY_TOLERANCE
+        print(f"  parity on {len(X)} rows: max |diff| = {diff:.3g}")
+
+        for row in benchmark(model, forest, X):
+            speedup = row["sklearn_s"] / row["compiled_s"]
+            print(f"  batch={row['batch']:>6}  sklearn={row['sklearn_s'] * 1e3:8.2f} ms  "
+                  f"compiled={row['compiled_s'] * 1e3:8.2f} ms  ({speedup:.1f}x)")
+
+    if not ok:
+        raise SystemExit(f"Compiled forest parity check failed (tolerance {PARITY_TOLERANCE})")
+
+
+if __name__ == "__main__":
+    main()
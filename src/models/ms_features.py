@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 
 # Simple Kyte-Doolittle hydrophobicity scale
 HYDRO = {
@@ -9,61 +8,166 @@ HYDRO = {
     "S": -0.8, "T": -0.7, "W": -0.9, "Y": -1.3, "V": 4.2,
 }
 
-def _aa_fraction(seq: str, aa: str) -> float:
-    if not seq:
-        return 0.0
-    return seq.count(aa) / len(seq)
+# Feature vector: [length, frac_A, frac_E, frac_K, frac_Y, frac_pos, frac_neg, hydro]
+N_FEATURES = 8
 
-def _avg_hydrophobicity(seq: str) -> float:
-    if not seq:
-        return 0.0
-    vals = [HYDRO.get(a, 0.0) for a in seq]
-    return float(np.mean(vals))
+# Composition classes: one per standard residue plus a trailing "other" class.
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+N_CLASSES = len(AMINO_ACIDS) + 1
 
-def _charge_proxy(seq: str):
+# Byte -> composition class lookup (non-standard residues map to "other")
+CLASS_LUT = np.full(256, len(AMINO_ACIDS), dtype=np.intp)
+for _i, _aa in enumerate(AMINO_ACIDS):
+    CLASS_LUT[ord(_aa)] = _i
+
+# Byte -> hydrophobicity lookup (unknown residues count as 0.0)
+HYDRO_LUT = np.zeros(256, dtype=np.float64)
+for _aa, _v in HYDRO.items():
+    HYDRO_LUT[ord(_aa)] = _v
+
+_IDX = {aa: i for i, aa in enumerate(AMINO_ACIDS)}
+_POSITIVE = [_IDX[a] for a in "KRH"]
+_NEGATIVE = [_IDX[a] for a in "DE"]
+
+
+def composition_counts(codes):
+    """
+    codes: uint8 array [n_samples, length] of ASCII residue codes
+    Returns: int array [n_samples, N_CLASSES] of per-class residue counts
+    """
+    n, L = codes.shape
+    flat = (np.arange(n)[:, None] * N_CLASSES + CLASS_LUT[codes]).ravel()
+    return np.bincount(flat, minlength=n * N_CLASSES).reshape(n, N_CLASSES)
+
+
+def features_from_counts(counts, hydro_sum, length):
+    """
+    Assemble the feature matrix from per-class counts, the summed
+    hydrophobicity and the sequence length of each sample.
+    Rows with length 0 are all zeros.
+    """
+    counts = np.asarray(counts)
+    length = np.asarray(length)
+    n = counts.shape[0]
+
+    X = np.zeros((n, N_FEATURES), dtype=np.float64)
+    X[:, 0] = length
+
+    nz = length > 0
+    L = length[nz].astype(np.float64)
+    c = counts[nz]
+    X[nz, 1] = c[:, _IDX["A"]] / L
+    X[nz, 2] = c[:, _IDX["E"]] / L
+    X[nz, 3] = c[:, _IDX["K"]] / L
+    X[nz, 4] = c[:, _IDX["Y"]] / L
+    X[nz, 5] = c[:, _POSITIVE].sum(axis=1) / L
+    X[nz, 6] = c[:, _NEGATIVE].sum(axis=1) / L
+    X[nz, 7] = np.asarray(hydro_sum)[nz] / L
+    return X
+
+
+def ms_features_from_codes(codes):
+    """
+    codes: uint8 array [n_samples, length] of equal-length, normalized
+    (stripped, upper-case) sequences.
+    Returns: float64 array [n_samples, N_FEATURES]
+    """
+    n, L = codes.shape
+    X = np.zeros((n, N_FEATURES), dtype=np.float64)
+    X[:, 0] = L
+    if L == 0:
+        return X
+
+    counts = composition_counts(codes)
+    X[:, 1:] = features_from_counts(counts, np.zeros(n), np.full(n, L))[:, 1:]
+
+    # Row-wise mean over the gathered scale matches np.mean() per sequence
+    X[:, 7] = HYDRO_LUT[codes].mean(axis=1)
+    return X
+
+
+def encode_sequences(seqs):
     """
-    Very rough charge proxies:
-    - Positive AA: K, R, H
-    - Negative AA: D, E
-    Returns (frac_positive, frac_negative)
+    Normalize sequences (strip, upper-case) and convert equal-length ones
+    to a uint8 code matrix. Non-ASCII characters become '?', which keeps
+    one byte per residue.
     """
-    if not seq:
-        return 0.0, 0.0
-    pos = sum(seq.count(a) for a in ["K", "R", "H"])
-    neg = sum(seq.count(a) for a in ["D", "E"])
-    L = len(seq)
-    return pos / L, neg / L
+    seqs = [str(s).strip().upper() for s in seqs]
+    L = len(seqs[0]) if seqs else 0
+    block = "".join(seqs).encode("ascii", "replace")
+    return np.frombuffer(block, dtype=np.uint8).reshape(len(seqs), L)
+
+
+def ms_features_batch(seqs, dtype=np.float32):
+    """
+    Vectorized featurizer for large batches.
+
+    seqs: iterable/list/Series of peptide sequences (str)
+    Returns: array [n_samples, N_FEATURES] of `dtype` (float32 by default,
+    which is what the forest evaluates on anyway)
+
+    Sequences are grouped by length and each group is featurized as one
+    uint8 code matrix, so there is no per-residue Python work.
+    """
+    seqs = [str(s).strip().upper() for s in seqs]
+    n = len(seqs)
+    X = np.zeros((n, N_FEATURES), dtype=np.float64)
+    if n == 0:
+        return X.astype(dtype)
+
+    lengths = np.fromiter(map(len, seqs), dtype=np.int64, count=n)
+    for L in np.unique(lengths):
+        idx = np.flatnonzero(lengths == L)
+        X[idx] = ms_features_from_codes(encode_sequences([seqs[i] for i in idx]))
+
+    return X.astype(dtype, copy=False)
+
 
 def ms_features(seqs):
     """
     seqs: iterable/list/Series of peptide sequences (str)
     Returns: numpy array [n_samples, n_features]
     """
-    rows = []
-
-    for seq in seqs:
-        seq = str(seq).strip().upper()
-
-        length = len(seq)
-        frac_A = _aa_fraction(seq, "A")
-        frac_E = _aa_fraction(seq, "E")
-        frac_K = _aa_fraction(seq, "K")
-        frac_Y = _aa_fraction(seq, "Y")
-
-        frac_pos, frac_neg = _charge_proxy(seq)
-        hydro = _avg_hydrophobicity(seq)
-
-        rows.append(
-            [
-                length,
-                frac_A,
-                frac_E,
-                frac_K,
-                frac_Y,
-                frac_pos,
-                frac_neg,
-                hydro,
-            ]
-        )
-
-    return np.array(rows)
+    return ms_features_batch(seqs, dtype=np.float64)
+
+
+def point_mutant_features(parent, residues=AMINO_ACIDS, positions=None):
+    """
+    Features of every single-point mutant of `parent`, derived from the
+    parent's composition counts in O(1) per mutant instead of
+    re-featurizing each mutant from scratch.
+
+    Mutants are ordered position-major, then by `residues`, skipping
+    substitutions that leave the residue unchanged. `parent` is expected
+    to be normalized already (stripped, upper-case ASCII). `positions`
+    optionally restricts mutation to the given 0-based positions.
+
+    Returns (positions, new_codes, X): 0-based mutated positions, uint8
+    codes of the substituted residues, and a float64 feature matrix
+    [n_mutants, N_FEATURES]. Values match ms_features() on the explicit
+    mutants up to floating-point rounding of the hydrophobicity mean.
+    """
+    codes = encode_sequences([parent])[0]
+    L = codes.shape[0]
+    new = np.frombuffer(residues.encode("ascii"), dtype=np.uint8)
+
+    sites = np.arange(L) if positions is None else np.asarray(positions, dtype=np.intp)
+    pos = np.repeat(sites, len(new))
+    sub = np.tile(new, len(sites))
+    keep = codes[pos] != sub
+    pos, sub = pos[keep], sub[keep]
+    old = codes[pos]
+
+    # Parent statistics, computed once
+    counts = composition_counts(codes[None, :])[0]
+    hydro_sum = HYDRO_LUT[codes].sum()
+
+    # Each mutant removes one `old` residue and adds one `sub` residue
+    rows = np.arange(len(pos))
+    m_counts = np.tile(counts, (len(pos), 1))
+    m_counts[rows, CLASS_LUT[old]] -= 1
+    m_counts[rows, CLASS_LUT[sub]] += 1
+    m_hydro = hydro_sum - HYDRO_LUT[old] + HYDRO_LUT[sub]
+
+    X = features_from_counts(m_counts, m_hydro, np.full(len(pos), L))
+    return pos, sub, X
@@ -0,0 +1,290 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+STATE_PATH = "data/processed/pipeline_state.json"
+
+# Bump to invalidate every recorded stage (e.g. after changing the record format)
+STATE_VERSION = 1
+
+
+class Stage:
+    """
+    One step of the data/training pipeline.
+
+    `func` is a "module:function" reference, called as
+    func(*inputs, *outputs, **params) in a worker process; `extra_outputs`
+    are files it writes without taking their paths as arguments. `code`
+    lists the source files whose edits should re-run the stage. Stages
+    depend on whichever stages produce their inputs.
+    """
+
+    def __init__(self, name, func, inputs, outputs, extra_outputs=(), params=None, code=()):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.extra_outputs = list(extra_outputs)
+        self.params = dict(params or {})
+        self.code = list(code)
+
+    def call_args(self):
+        return self.inputs + self.outputs
+
+    def all_outputs(self):
+        return self.outputs + self.extra_outputs
+
+
+STAGES = [
+    Stage(
+        "glp1_table",
+        "data.build_glp1_table:main",
+        inputs=["data/raw/GLP1R_complete_approx.xlsx"],
+        outputs=["data/processed/glp1_substitutions_effects.csv"],
+        code=["src/data/build_glp1_table.py", "src/data/sheet_cache.py"],
+    ),
+    Stage(
+        "glp1_labels",
+        "models.prepare_glp1_dataset:main",
+        inputs=["data/processed/glp1_substitutions_effects.csv"],
+        outputs=["data/processed/glp1_substitutions_labeled.csv"],
+        code=["src/models/prepare_glp1_dataset.py"],
+    ),
+    Stage(
+        "glp1_models",
+        "models.train_glp1_models:main",
+        inputs=["data/processed/glp1_substitutions_labeled.csv"],
+        outputs=[
+            "data/processed/glp1_encoder.pkl",
+            "data/processed/model_glp1_diabetes_rf.pkl",
+            "data/processed/model_glp1_sctr_rf.pkl",
+        ],
+        extra_outputs=[
+            "data/processed/model_glp1_diabetes_rf.forest.npz",
+            "data/processed/glp1_effect_table.npz",
+            "data/processed/model_glp1_sctr_rf.forest.npz",
+            "data/processed/glp1_sctr_effect_table.npz",
+        ],
+        params={"n_estimators": 300, "random_state": 42},
+        code=[
+            "src/models/train_glp1_models.py",
+            "src/models/features_glp1.py",
+            "src/models/compiled_forest.py",
+            "src/optimization/score_glp1_sequence.py",
+        ],
+    ),
+    Stage(
+        "ms_model",
+        "models.train_ms_model:main",
+        inputs=["data/raw/ms_peptides.csv"],
+        outputs=["data/processed/model_ms_rf.pkl"],
+        extra_outputs=["data/processed/model_ms_rf.forest.npz"],
+        params={"n_estimators": 300, "random_state": 42},
+        code=[
+            "src/models/train_ms_model.py",
+            "src/models/ms_features.py",
+            "src/models/compiled_forest.py",
+        ],
+    ),
+]
+
+
+# Registry model published after each training stage (see models.registry)
+PUBLISHES = {"glp1_models": "glp1", "ms_model": "ms"}
+
+
+# ---------- HASHING / STATE ----------
+
+def file_digest(path):
+    """sha256 of a file's contents, or None if it is missing."""
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+
+def stage_signature(stage):
+    """Hashes of everything that determines a stage's outputs."""
+    return {
+        "version": STATE_VERSION,
+        "func": stage.func,
+        "params": json.dumps(stage.params, sort_keys=True),
+        "inputs": {p: file_digest(p) for p in stage.inputs},
+        "code": {p: file_digest(p) for p in stage.code},
+    }
+
+
+def load_state(path=STATE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_PATH):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def is_up_to_date(stage, state):
+    """
+    True when the stage ran before with identical inputs, parameters and
+    code, and its outputs are still exactly what it wrote.
+    """
+    record = state.get(stage.name)
+    if record is None or record.get("signature") != stage_signature(stage):
+        return False
+    return all(file_digest(p) == record["outputs"].get(p) for p in stage.all_outputs())
+
+
+# ---------- SCHEDULING ----------
+
+def dependencies(stages):
+    """stage name -> names of the stages producing its inputs."""
+    producer = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: {producer[p] for p in s.inputs if p in producer} for s in stages}
+
+
+def with_upstream(names, deps):
+    """The given stages plus everything they (transitively) depend on."""
+    todo, seen = list(names), set()
+    while todo:
+        name = todo.pop()
+        if name not in seen:
+            seen.add(name)
+            todo.extend(deps[name])
+    return seen
+
+
+def _run_stage(func, args, params):
+    """Worker entry point: import and call a stage function."""
+    import importlib
+
+    module_name, func_name = func.split(":")
+    t0 = time.perf_counter()
+    getattr(importlib.import_module(module_name), func_name)(*args, **params)
+    return time.perf_counter() - t0
+
+
+def run_pipeline(targets=None, force=False, jobs=2, dry_run=False, stages=STAGES, state_path=STATE_PATH):
+    """
+    Run the stages needed for `targets` (default: all) in dependency order.
+
+    A stage is skipped when it is up to date: its inputs are hashed after
+    upstream stages finish, so an upstream re-run that reproduces the same
+    files does not cascade. Otherwise it runs, and its signature and output
+    hashes are recorded. Independent stages (the GLP-1 and MS branches) run in
+    parallel in up to `jobs` worker processes.
+
+    Returns {stage name: "ran" | "skipped" | "failed" | "blocked" | "would run"}.
+    """
+    by_name = {s.name: s for s in stages}
+    deps = dependencies(stages)
+    unknown = set(targets or ()) - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    selected = with_upstream(targets or by_name, deps)
+
+    state = load_state(state_path)
+    status = {}
+    pending = [s for s in stages if s.name in selected]
+    running = {}
+
+    def ready(stage):
+        return all(status.get(d) in ("ran", "skipped", "would run") for d in deps[stage.name])
+
+    def blocked(stage):
+        return any(status.get(d) in ("failed", "blocked") for d in deps[stage.name])
+
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for stage in list(pending):
+                if blocked(stage):
+                    pending.remove(stage)
+                    status[stage.name] = "blocked"
+                    print(f"[{stage.name}] blocked by a failed upstream stage")
+                    continue
+                if not ready(stage):
+                    continue
+                pending.remove(stage)
+
+                # In a dry run, inputs of stages downstream of a pending one are unknown
+                upstream_pending = any(status[d] == "would run" for d in deps[stage.name])
+                if not force and not upstream_pending and is_up_to_date(stage, state):
+                    status[stage.name] = "skipped"
+                    print(f"[{stage.name}] up to date")
+                elif dry_run:
+                    status[stage.name] = "would run"
+                    print(f"[{stage.name}] would run")
+                else:
+                    print(f"[{stage.name}] running")
+                    future = pool.submit(_run_stage, stage.func, stage.call_args(), stage.params)
+                    running[future] = stage
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    elapsed = future.result()
+                except Exception as e:
+                    status[stage.name] = "failed"
+                    print(f"[{stage.name}] failed: {type(e).__name__}: {e}")
+                    continue
+
+                # Signature is taken after the run, so it reflects the inputs used
+                state[stage.name] = {
+                    "signature": stage_signature(stage),
+                    "outputs": {p: file_digest(p) for p in stage.all_outputs()},
+                    "seconds": elapsed,
+                    "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+                save_state(state, state_path)
+                status[stage.name] = "ran"
+                print(f"[{stage.name}] done in {elapsed:.1f}s")
+
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental GLP-1 / MS data and training pipeline")
+    parser.add_argument("stages", nargs="*", help="stages to bring up to date (default: all) — "
+                        + ", ".join(s.name for s in STAGES))
+    parser.add_argument("--force", action="store_true", help="re-run the selected stages even if up to date")
+    parser.add_argument("--jobs", type=int, default=2, help="stages run in parallel (default %(default)s)")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    parser.add_argument("--publish", action="store_true",
+                        help="publish retrained models to the model registry as new active versions")
+    args = parser.parse_args(argv)
+
+    # Stage paths are relative to the repository root
+    os.chdir(ROOT_DIR)
+    status = run_pipeline(args.stages or None, args.force, args.jobs, args.dry_run)
+    if any(s in ("failed", "blocked") for s in status.values()):
+        raise SystemExit(1)
+
+    if args.publish:
+        from models.registry import REGISTRY
+
+        for stage_name, model in PUBLISHES.items():
+            if status.get(stage_name) == "ran":
+                print(f"[{stage_name}] published {model} {REGISTRY.publish(model, note='pipeline')}")
+
+
+if __name__ == "__main__":
+    main()
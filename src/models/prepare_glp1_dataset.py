@@ -1,9 +1,11 @@
 import pandas as pd
 import os
 
-def main():
-    in_path = "data/processed/glp1_substitutions_effects.csv"
-    out_path = "data/processed/glp1_substitutions_labeled.csv"
+IN_PATH = "data/processed/glp1_substitutions_effects.csv"
+OUT_PATH = "data/processed/glp1_substitutions_labeled.csv"
+
+
+def main(in_path: str = IN_PATH, out_path: str = OUT_PATH):
 
     # Load the pivoted substitutions table
     df = pd.read_csv(in_path)
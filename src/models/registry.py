@@ -0,0 +1,246 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import contextvars
+import json
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+PROCESSED_DIR = os.path.join(ROOT_DIR, "data", "processed")
+
+# Registry location; PEPTIDE_MODEL_REGISTRY overrides it for deployments
+REGISTRY_ROOT = os.environ.get("PEPTIDE_MODEL_REGISTRY", os.path.join(ROOT_DIR, "data", "models"))
+MANIFEST_FILE = "registry.json"
+
+# Artifacts of each registered model: (required files, optional files)
+MODEL_FILES = {
+    "glp1": (
+        ["glp1_encoder.pkl", "model_glp1_diabetes_rf.pkl"],
+        [
+            "model_glp1_diabetes_rf.forest.npz",
+            "glp1_effect_table.npz",
+            "model_glp1_sctr_rf.pkl",
+            "model_glp1_sctr_rf.forest.npz",
+            "glp1_sctr_effect_table.npz",
+        ],
+    ),
+    "ms": (
+        ["model_ms_rf.pkl"],
+        ["model_ms_rf.forest.npz"],
+    ),
+}
+
+
+class ModelRegistry:
+    """
+    Local, versioned model store.
+
+    Each published version is an immutable directory
+    <root>/<model>/<version>/ holding that model's artifacts, and
+    <root>/registry.json records every version and the active one per model.
+    Publishing copies artifacts into a fresh directory before the manifest
+    is atomically replaced, so readers never see a half-written version.
+    """
+
+    def __init__(self, root: str = REGISTRY_ROOT):
+        self.root = root
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, MANIFEST_FILE)
+
+    def manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"models": {}}
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def versions(self, name: str):
+        return self.manifest()["models"].get(name, {}).get("versions", {})
+
+    def active(self, name: str):
+        """(version, directory) of the active version of `name`, or None."""
+        entry = self.manifest()["models"].get(name)
+        if not entry or not entry.get("active"):
+            return None
+        version = entry["active"]
+        return version, os.path.join(self.root, name, version)
+
+    def publish(self, name: str, source_dir: str = PROCESSED_DIR, activate: bool = True, note: str = ""):
+        """
+        Copy the artifacts of `name` from `source_dir` into a new version
+        directory and record it (activating it unless activate=False).
+        File timestamps are preserved, so compiled forests and effect
+        tables stay valid for the copied pickles. Returns the new version.
+        """
+        required, optional = MODEL_FILES[name]
+        missing = [f for f in required if not os.path.exists(os.path.join(source_dir, f))]
+        if missing:
+            raise FileNotFoundError(f"Missing {name} artifacts in {source_dir}: {', '.join(missing)}")
+
+        with self._lock:
+            manifest = self.manifest()
+            entry = manifest["models"].setdefault(name, {"active": None, "versions": {}})
+            numbers = [int(v[1:]) for v in entry["versions"] if v[1:].isdigit()]
+            version = f"v{max(numbers, default=0) + 1}"
+
+            model_dir = os.path.join(self.root, name)
+            staging = os.path.join(model_dir, f".staging-{version}")
+            os.makedirs(staging, exist_ok=True)
+            files = [f for f in required + optional if os.path.exists(os.path.join(source_dir, f))]
+            for filename in files:
+                shutil.copy2(os.path.join(source_dir, filename), os.path.join(staging, filename))
+            os.replace(staging, os.path.join(model_dir, version))
+
+            entry["versions"][version] = {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "files": files,
+                "note": note,
+            }
+            if activate:
+                entry["active"] = version
+            self._write_manifest(manifest)
+
+        return version
+
+    def activate(self, name: str, version: str):
+        """Make an existing version the active one (also used to roll back)."""
+        with self._lock:
+            manifest = self.manifest()
+            entry = manifest["models"].get(name, {})
+            if version not in entry.get("versions", {}):
+                raise KeyError(f"Unknown {name} version: {version}")
+            entry["active"] = version
+            self._write_manifest(manifest)
+
+
+# Registry used by the serving path
+REGISTRY = ModelRegistry()
+
+
+def locate_artifacts(name: str):
+    """
+    (registry version, directory) to serve `name` from: the active
+    registry version when there is one, else (None, data/processed) as
+    before the registry existed.
+    """
+    active = REGISTRY.active(name)
+    return active if active is not None else (None, PROCESSED_DIR)
+
+
+class ModelSlot:
+    """
+    Holds the model snapshot a scoring module serves from.
+
+    `locate()` cheaply returns (version label, directory) of what should
+    be served; `load(version, directory)` builds a snapshot (an object
+    with a `version` attribute). Reloads build the new snapshot off to the
+    side and then replace the reference in one assignment, so requests
+    never see a half-loaded model. Requests that pin a snapshot keep using
+    it until they finish, even if a newer one is swapped in meanwhile.
+    """
+
+    def __init__(self, name, locate, load):
+        self.name = name
+        self._locate = locate
+        self._load = load
+        self._active = None
+        self._lock = threading.Lock()
+        self._pinned = contextvars.ContextVar(f"{name}_model", default=None)
+
+    def get(self):
+        """The pinned snapshot of the current request, else the active one (loaded lazily)."""
+        snapshot = self._pinned.get()
+        if snapshot is not None:
+            return snapshot
+        snapshot = self._active
+        if snapshot is None:
+            with self._lock:
+                if self._active is None:
+                    self._active = self._load(*self._locate())
+                snapshot = self._active
+        return snapshot
+
+    def swap(self, snapshot):
+        self._active = snapshot
+
+    def reload(self, warm=None):
+        """
+        Load what `locate()` now points to and swap it in if its version
+        differs from the active one. `warm(snapshot)`, if given, runs with
+        the new snapshot pinned before it goes live. Returns the active
+        snapshot.
+        """
+        with self._lock:
+            version, directory = self._locate()
+            current = self._active
+            if current is not None and current.version == version:
+                return current
+
+            snapshot = self._load(version, directory)
+            if warm is not None:
+                with self.pin(snapshot):
+                    warm(snapshot)
+            self._active = snapshot
+            return snapshot
+
+    @contextmanager
+    def pin(self, snapshot):
+        token = self._pinned.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            self._pinned.reset(token)
+
+    @contextmanager
+    def pinned(self):
+        """Pin the active snapshot for the duration of a request."""
+        with self.pin(self.get()) as snapshot:
+            yield snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local versioned model registry")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("publish", help="publish artifacts as a new version")
+    p.add_argument("model", choices=sorted(MODEL_FILES))
+    p.add_argument("--from", dest="source", default=PROCESSED_DIR, help="artifact directory")
+    p.add_argument("--no-activate", action="store_true", help="publish without activating")
+    p.add_argument("--note", default="")
+
+    p = sub.add_parser("activate", help="activate (or roll back to) a version")
+    p.add_argument("model", choices=sorted(MODEL_FILES))
+    p.add_argument("version")
+
+    sub.add_parser("list", help="show versions and the active one")
+    args = parser.parse_args(argv)
+
+    if args.command == "publish":
+        version = REGISTRY.publish(args.model, args.source, not args.no_activate, args.note)
+        print(f"Published {args.model} {version}" + ("" if args.no_activate else " (active)"))
+    elif args.command == "activate":
+        REGISTRY.activate(args.model, args.version)
+        print(f"Activated {args.model} {args.version}")
+    else:
+        for name, entry in sorted(REGISTRY.manifest()["models"].items()):
+            for version, info in sorted(entry["versions"].items(), key=lambda kv: int(kv[0][1:])):
+                marker = "*" if version == entry.get("active") else " "
+                print(f"{marker} {name} {version}  {info['created']}  {info.get('note', '')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,47 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 
 from models.features_glp1 import GLP1FeatureEncoder
+from models.compiled_forest import export_forest
+from optimization.score_glp1_sequence import (
+    SCTR_MODEL_FILE,
+    SCTR_TABLE_FILE,
+    _data_path,
+    build_effect_table,
+    save_effect_table,
+    model_version,
+)
 
-def main():
+IN_PATH = "data/processed/glp1_substitutions_labeled.csv"
+ENCODER_PATH = "data/processed/glp1_encoder.pkl"
+MODEL_PATH = "data/processed/model_glp1_diabetes_rf.pkl"
+SCTR_MODEL_PATH = "data/processed/model_glp1_sctr_rf.pkl"
+
+
+def _train_forest(X, y, n_estimators, random_state):
+    """Fit a random forest on a train split; returns (model, R^2 on the test split)."""
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=random_state
+    )
+    model = RandomForestRegressor(
+        n_estimators=n_estimators,
+        random_state=random_state,
+        max_depth=None,
+        n_jobs=-1
+    )
+    model.fit(X_train, y_train)
+    return model, model.score(X_test, y_test)
+
+
+def main(
+    in_path: str = IN_PATH,
+    encoder_path: str = ENCODER_PATH,
+    model_path: str = MODEL_PATH,
+    sctr_model_path: str = SCTR_MODEL_PATH,
+    n_estimators: int = 300,
+    random_state: int = 42,
+):
     # Load labeled substitution table
-    df = pd.read_csv("data/processed/glp1_substitutions_labeled.csv")
+    df = pd.read_csv(in_path)
 
     # Define X and y for the "Diabetes potency" model
     # Benefit target = GLP1R_benefit
@@ -22,27 +59,36 @@ def main():
     encoder = GLP1FeatureEncoder()
     X = encoder.fit_transform(df)
 
-    # Train-test split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
-
     # Train Random Forest
-    model = RandomForestRegressor(
-        n_estimators=300,
-        random_state=42,
-        max_depth=None,
-        n_jobs=-1
+    model, score = _train_forest(X, y, n_estimators, random_state)
+
+    # Off-target model on the rows with an SCTR measurement:
+    # SCTR_penalty = -SCTR effect, so higher means more selective
+    sctr_rows = df["SCTR_penalty"].notna().values
+    sctr_model, sctr_score = _train_forest(
+        X[sctr_rows], df["SCTR_penalty"].values[sctr_rows], n_estimators, random_state
     )
-    model.fit(X_train, y_train)
 
-    # Save encoder + model
-    joblib.dump(encoder, "data/processed/glp1_encoder.pkl")
-    joblib.dump(model, "data/processed/model_glp1_diabetes_rf.pkl")
+    # Save encoder + models
+    joblib.dump(encoder, encoder_path)
+    joblib.dump(model, model_path)
+    export_forest(model, model_path)
+    joblib.dump(sctr_model, sctr_model_path)
+    export_forest(sctr_model, sctr_model_path)
+
+    # Precompute the (position x residue) effect tables used for scoring.
+    # The serving path only reads them for the default artifacts.
+    if (encoder_path, model_path, sctr_model_path) == (ENCODER_PATH, MODEL_PATH, SCTR_MODEL_PATH):
+        save_effect_table(build_effect_table(encoder, model), model_version())
+        save_effect_table(
+            build_effect_table(encoder, sctr_model),
+            model_version(model_file=SCTR_MODEL_FILE),
+            _data_path(SCTR_TABLE_FILE),
+        )
 
     # Print simple evaluation
-    score = model.score(X_test, y_test)
     print(f"Diabetes GLP-1 model R^2 on test set: {score:.3f}")
+    print(f"SCTR off-target model R^2 on test set: {sctr_score:.3f}")
 
 if __name__ == "__main__":
     main()
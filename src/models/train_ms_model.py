@@ -6,11 +6,19 @@ from sklearn.model_selection import train_test_split
 import joblib
 
 from models.ms_features import ms_features
+from models.compiled_forest import export_forest
 
 
-def main():
-    in_path = "data/raw/ms_peptides.csv"
-    out_model_path = "data/processed/model_ms_rf.pkl"
+IN_PATH = "data/raw/ms_peptides.csv"
+MODEL_PATH = "data/processed/model_ms_rf.pkl"
+
+
+def main(
+    in_path: str = IN_PATH,
+    out_model_path: str = MODEL_PATH,
+    n_estimators: int = 300,
+    random_state: int = 42,
+):
 
     # Load the MS peptide dataset
     df = pd.read_csv(in_path)
@@ -21,19 +29,20 @@ def main():
 
     # Train-test split
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+        X, y, test_size=0.2, random_state=random_state, stratify=y
     )
 
     # Random Forest classifier
     clf = RandomForestClassifier(
-        n_estimators=300,
-        random_state=42,
+        n_estimators=n_estimators,
+        random_state=random_state,
         n_jobs=-1
     )
     clf.fit(X_train, y_train)
 
     # Save model
     joblib.dump(clf, out_model_path)
+    export_forest(clf, out_model_path)
     print(f"Saved MS model → {out_model_path}")
 
     # Simple evaluation
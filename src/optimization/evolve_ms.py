@@ -0,0 +1,221 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models.ms_features import AMINO_ACIDS, ms_features_from_codes
+from optimization.score_ms_sequence import MODEL_SLOT, score_ms_features
+
+_ALPHABET = np.frombuffer(AMINO_ACIDS.encode("ascii"), dtype=np.uint8)
+
+
+# ---------- BATCH EVALUATION ----------
+
+def _init_worker(snapshot):
+    """Process-pool initializer: install the caller's MS model version once per worker."""
+    MODEL_SLOT.swap(snapshot)
+
+
+def _score_codes(codes):
+    """Score a uint8 code matrix of equal-length sequences in one model call."""
+    return score_ms_features(ms_features_from_codes(codes))
+
+
+class _Evaluator:
+    """
+    Scores populations in batches, optionally fanned out to a process pool,
+    and remembers every sequence it has scored (in first-seen order).
+    """
+
+    def __init__(self, n_workers: int = 1):
+        self.archive = {}
+        self.pool = None
+        self.n_workers = n_workers
+        if n_workers > 1:
+            # Workers score with the model version pinned by the caller, even
+            # if another version is activated while the search runs
+            self.pool = ProcessPoolExecutor(
+                max_workers=n_workers, initializer=_init_worker, initargs=(MODEL_SLOT.get(),)
+            )
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __call__(self, pop):
+        keys = [row.tobytes() for row in pop]
+
+        # Only score sequences we haven't seen yet (deduplicated)
+        todo = list(dict.fromkeys(k for k in keys if k not in self.archive))
+        if todo:
+            codes = np.frombuffer(b"".join(todo), dtype=np.uint8).reshape(len(todo), pop.shape[1])
+            if self.pool is None or len(todo) < 2 * self.n_workers:
+                scores = _score_codes(codes)
+            else:
+                chunks = np.array_split(codes, self.n_workers)
+                scores = np.concatenate(list(self.pool.map(_score_codes, chunks)))
+            self.archive.update(zip(todo, scores.tolist()))
+
+        return np.array([self.archive[k] for k in keys])
+
+
+# ---------- SEARCH STRATEGIES ----------
+
+def _point_mutate(rng, pop):
+    """Apply one random substitution to every row (in place)."""
+    rows = np.arange(pop.shape[0])
+    cols = rng.integers(pop.shape[1], size=pop.shape[0])
+    pop[rows, cols] = rng.choice(_ALPHABET, size=pop.shape[0])
+    return pop
+
+
+def _genetic(rng, evaluate, start, generations, population_size, mutation_rate,
+             crossover_rate, elite_fraction, tournament_size, should_stop):
+    L = start.shape[0]
+    rate = mutation_rate if mutation_rate is not None else 1.0 / L
+    n_elite = max(1, int(round(elite_fraction * population_size)))
+    n_children = population_size - n_elite
+
+    pop = _point_mutate(rng, np.tile(start, (population_size, 1)))
+
+    for gen in range(generations):
+        scores = evaluate(pop)
+        if gen == generations - 1 or should_stop(gen + 1):
+            break
+
+        # Elitism: carry the best individuals over unchanged
+        elite = pop[np.argsort(-scores, kind="stable")[:n_elite]]
+
+        # Tournament selection of two parents per child
+        entrants = rng.integers(population_size, size=(n_children, 2, tournament_size))
+        winners = np.take_along_axis(
+            entrants, scores[entrants].argmax(axis=2)[..., None], axis=2
+        )[..., 0]
+        p1, p2 = pop[winners[:, 0]], pop[winners[:, 1]]
+
+        # Uniform crossover
+        cross = rng.random(n_children) < crossover_rate
+        take_p2 = (rng.random((n_children, L)) < 0.5) & cross[:, None]
+        children = np.where(take_p2, p2, p1)
+
+        # Per-residue mutation
+        mutate = rng.random((n_children, L)) < rate
+        children[mutate] = rng.choice(_ALPHABET, size=int(mutate.sum()))
+
+        pop = np.vstack([elite, children])
+
+
+def _anneal(rng, evaluate, start, generations, population_size, temperature, should_stop):
+    t_start, t_end = temperature
+    chains = np.tile(start, (population_size, 1))
+    current = evaluate(chains)
+
+    for gen in range(generations):
+        if should_stop(gen):
+            break
+
+        # Geometric cooling schedule
+        frac = gen / max(1, generations - 1)
+        T = t_start * (t_end / t_start) ** frac
+
+        proposals = _point_mutate(rng, chains.copy())
+        scores = evaluate(proposals)
+
+        # Metropolis acceptance, evaluated for all chains at once
+        gain = np.minimum(scores - current, 0.0)
+        accept = rng.random(population_size) < np.exp(gain / T)
+        chains[accept] = proposals[accept]
+        current[accept] = scores[accept]
+
+
+# ---------- PUBLIC API ----------
+
+def evolve_for_ms(
+    start_seq: str,
+    top_k: int = 5,
+    method: str = "ga",
+    generations: int = 50,
+    population_size: int = 200,
+    seed: int = 0,
+    n_workers: int = 1,
+    time_budget: float = None,
+    mutation_rate: float = None,
+    crossover_rate: float = 0.7,
+    elite_fraction: float = 0.05,
+    tournament_size: int = 3,
+    temperature=(0.05, 0.001),
+    progress=None,
+):
+    """
+    Population-based MS optimization over multi-mutation variants.
+
+    method: "ga" (genetic algorithm: elitism, tournament selection,
+            uniform crossover, per-residue mutation) or "anneal"
+            (population_size parallel simulated-annealing chains).
+
+    Each generation is scored as one batch through the MS model; with
+    n_workers > 1 batches are split across a process pool whose workers
+    score with the model version in use when the run started. Runs are
+    deterministic for a given seed unless `time_budget` (seconds, checked
+    between generations) cuts them short.
+    `progress(done, generations)`, if given, is called between generations;
+    an exception it raises aborts the run.
+
+    Returns the top_k distinct sequences seen during the run, excluding
+    the start sequence, each with its score and mutations.
+    """
+    if method not in ("ga", "anneal"):
+        raise ValueError(f"Unknown method: {method!r} (expected 'ga' or 'anneal')")
+
+    start_seq = start_seq.strip().upper()
+    if not start_seq or top_k <= 0 or generations <= 0 or population_size <= 0:
+        return []
+
+    start = np.frombuffer(start_seq.encode("ascii", "replace"), dtype=np.uint8)
+    start_seq = start.tobytes().decode("ascii")
+    rng = np.random.default_rng(seed)
+
+    t0 = time.monotonic()
+
+    def should_stop(done):
+        if progress is not None:
+            progress(done, generations)
+        return time_budget is not None and time.monotonic() - t0 >= time_budget
+
+    evaluate = _Evaluator(n_workers)
+    try:
+        if method == "ga":
+            _genetic(rng, evaluate, start, generations, population_size, mutation_rate,
+                     crossover_rate, elite_fraction, tournament_size, should_stop)
+        else:
+            _anneal(rng, evaluate, start, generations, population_size, temperature,
+                    should_stop)
+    finally:
+        evaluate.close()
+
+    start_key = start.tobytes()
+    seen = [(k, s) for k, s in evaluate.archive.items() if k != start_key]
+    # Stable sort: ties keep first-seen order
+    seen.sort(key=lambda item: item[1], reverse=True)
+
+    results = []
+    for key, score in seen[:top_k]:
+        seq = key.decode("ascii")
+        mutations = [
+            {"position": i + 1, "substitution": seq[i]}
+            for i in range(len(seq)) if seq[i] != start_seq[i]
+        ]
+        results.append({"sequence": seq, "mutations": mutations, "score": float(score)})
+
+    return results
+
+
+if __name__ == "__main__":
+    start = "AEKAEKAEKAEKAAAKAEK"  # glatiramer-ish
+    print("Top 5 evolved MS candidates for a test peptide:")
+    for i, item in enumerate(evolve_for_ms(start, generations=30, seed=42), start=1):
+        print(f"{i}. seq={item['sequence']}  muts={len(item['mutations'])}  score={item['score']:.3f}")
@@ -1,32 +1,57 @@
-import pandas as pd
+import csv
+import os
+
 from optimization.score_glp1_sequence import BASE_GLP1
 
-SUB_TABLE_PATH = "data/processed/glp1_substitutions_labeled.csv"
+SUB_TABLE_FILE = "glp1_substitutions_labeled.csv"
 
-# Load substitution data once at import time
-df_subs = pd.read_csv(SUB_TABLE_PATH)
+# Module-level cache for the position -> allowed substitutions index
+_allowed_by_pos = None
 
-# Build: position -> list of allowed substitutions (strings)
-allowed_by_pos = (
-    df_subs.groupby("Position")["Substitution"]
-           .apply(lambda s: sorted(set(s)))
-           .to_dict()
-)
 
-def generate_single_mutants(start_seq: str = BASE_GLP1):
-    """
-    Generate single-point mutants of the starting GLP-1 sequence
-    using only substitutions that appear in the GLP-1 dataset.
+def _data_path(name: str) -> str:
+    """Return absolute path to data/processed/<name> relative to repo root."""
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    return os.path.join(root, 'data', 'processed', name)
 
-    Returns a list of dicts:
-    [
-      {"sequence": "...", "position": 12, "substitution": "Y"},
-      ...
-    ]
+
+SUB_TABLE_PATH = _data_path(SUB_TABLE_FILE)
+
+
+def load_substitution_index(path: str = SUB_TABLE_PATH):
+    """
+    Build position -> sorted list of allowed substitutions (strings) from
+    the labeled GLP-1 substitution table, with positions in ascending order.
     """
-    candidates = []
+    by_pos = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            by_pos.setdefault(int(row["Position"]), set()).add(row["Substitution"])
+    return {pos: sorted(subs) for pos, subs in sorted(by_pos.items())}
+
+
+def get_allowed_by_pos():
+    """Lazy-load the substitution index on first use."""
+    global _allowed_by_pos
+    if _allowed_by_pos is None:
+        _allowed_by_pos = load_substitution_index()
+    return _allowed_by_pos
+
+
+def __getattr__(name):
+    # `allowed_by_pos` used to be built at import time; keep it importable
+    if name == "allowed_by_pos":
+        return get_allowed_by_pos()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    for pos, subs in allowed_by_pos.items():
+
+def iter_single_mutations(start_seq: str = BASE_GLP1):
+    """
+    Lazily yield compact (position, substitution) records for every
+    single-point mutant of start_seq, using only substitutions that
+    appear in the GLP-1 dataset. Positions are 1-based.
+    """
+    for pos, subs in get_allowed_by_pos().items():
         idx = pos - 1  # convert 1-based to 0-based index
 
         # Skip if position is outside the sequence
@@ -43,16 +68,32 @@ def generate_single_mutants(start_seq: str = BASE_GLP1):
             if start_seq[idx] == sub:
                 continue
 
-            new_seq_list = list(start_seq)
-            new_seq_list[idx] = sub
-            new_seq = "".join(new_seq_list)
+            yield pos, sub
+
+
+def apply_mutation(start_seq: str, position: int, substitution: str) -> str:
+    """Return start_seq with the residue at 1-based `position` replaced."""
+    return start_seq[:position - 1] + substitution + start_seq[position:]
+
+
+def generate_single_mutants(start_seq: str = BASE_GLP1):
+    """
+    Generate single-point mutants of the starting GLP-1 sequence
+    using only substitutions that appear in the GLP-1 dataset.
 
-            candidates.append(
-                {
-                    "sequence": new_seq,
-                    "position": pos,
-                    "substitution": sub,
-                }
-            )
+    Returns a list of dicts:
+    [
+      {"sequence": "...", "position": 12, "substitution": "Y"},
+      ...
+    ]
 
-    return candidates
+    Prefer iter_single_mutations when full sequences are not needed.
+    """
+    return [
+        {
+            "sequence": apply_mutation(start_seq, pos, sub),
+            "position": pos,
+            "substitution": sub,
+        }
+        for pos, sub in iter_single_mutations(start_seq)
+    ]
@@ -0,0 +1,208 @@
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Instrumentation is on unless PEPTIDE_METRICS=0; when off, timed() hands
+# back a shared no-op context manager and the observe functions return
+# immediately.
+_enabled = os.environ.get("PEPTIDE_METRICS", "1") != "0"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 10, 30, 100, 300, 1000, 3000, 10000, 30000, 100000)
+
+# name -> (type, help, label names, buckets)
+_DEFINITIONS = {
+    "peptide_stage_duration_seconds": (
+        "histogram", "Time spent in each optimization pipeline stage.", ("stage",), LATENCY_BUCKETS),
+    "peptide_candidates": (
+        "histogram", "Candidates scored per optimization call.", ("pipeline",), COUNT_BUCKETS),
+    "peptide_model_load_seconds": (
+        "gauge", "Duration of the most recent load of each model artifact.", ("model",), None),
+    "peptide_model_loads_total": (
+        "counter", "Model artifact loads.", ("model",), None),
+    "peptide_score_cache_lookups_total": (
+        "counter", "Persistent score-cache lookups of distinct feature rows.", ("result",), None),
+    "peptide_http_request_duration_seconds": (
+        "histogram", "HTTP request latency.", ("method", "route", "status"), LATENCY_BUCKETS),
+}
+
+_lock = threading.Lock()
+_values = {name: {} for name in _DEFINITIONS}  # name -> {label values: value}
+
+# Per-request stage timings, collected for the Server-Timing header
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(flag: bool):
+    global _enabled
+    _enabled = bool(flag)
+
+
+def reset():
+    """Drop every recorded value."""
+    with _lock:
+        for series in _values.values():
+            series.clear()
+
+
+# ---------- RECORDING ----------
+
+def observe(name: str, value: float, *labels):
+    """Record `value` in histogram `name` for the given label values."""
+    if not _enabled:
+        return
+    buckets = _DEFINITIONS[name][3]
+    i = bisect_left(buckets, value)
+    with _lock:
+        entry = _values[name].get(labels)
+        if entry is None:
+            entry = _values[name][labels] = [[0] * (len(buckets) + 1), 0.0, 0]
+        entry[0][i] += 1
+        entry[1] += value
+        entry[2] += 1
+
+
+def set_gauge(name: str, value: float, *labels):
+    if not _enabled:
+        return
+    with _lock:
+        _values[name][labels] = float(value)
+
+
+def inc(name: str, *labels, amount: float = 1.0):
+    if not _enabled:
+        return
+    with _lock:
+        _values[name][labels] = _values[name].get(labels, 0.0) + amount
+
+
+class _Timer:
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        observe("peptide_stage_duration_seconds", elapsed, self.stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            total, count = timings.get(self.stage, (0.0, 0))
+            timings[self.stage] = (total + elapsed, count + 1)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(stage: str):
+    """
+    Context manager that records the duration of a pipeline stage, both in
+    the stage histogram and in the current request's Server-Timing.
+
+        with timed("glp1.inference"):
+            ...
+    """
+    return _Timer(stage) if _enabled else _NULL_TIMER
+
+
+def observe_candidates(pipeline: str, n: int):
+    observe("peptide_candidates", n, pipeline)
+
+
+def record_model_load(model: str, seconds: float):
+    set_gauge("peptide_model_load_seconds", seconds, model)
+    inc("peptide_model_loads_total", model)
+
+
+# ---------- PER-REQUEST TIMINGS ----------
+
+def start_request():
+    """Start collecting stage timings for the current request; returns a reset token."""
+    return _request_timings.set({})
+
+
+def finish_request(token):
+    """Stop collecting and return {stage: (seconds, calls)} for the request."""
+    timings = _request_timings.get()
+    _request_timings.reset(token)
+    return timings or {}
+
+
+def server_timing_header(timings, total=None):
+    """Format stage timings as a Server-Timing header value (durations in ms)."""
+    parts = [
+        f'{stage};dur={seconds * 1e3:.3f};desc="{count} call{"s" if count != 1 else ""}"'
+        for stage, (seconds, count) in timings.items()
+    ]
+    if total is not None:
+        parts.append(f"total;dur={total * 1e3:.3f}")
+    return ", ".join(parts)
+
+
+# ---------- EXPOSITION ----------
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def render(extra=None) -> str:
+    """
+    All metrics in the Prometheus text exposition format.
+
+    extra: optional {name: (type, help, value)} of unlabelled gauges or
+    counters sampled by the caller (e.g. result-cache statistics).
+    """
+    lines = []
+    with _lock:
+        for name, (kind, help_text, label_names, buckets) in _DEFINITIONS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(_values[name].items()):
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(label_names, labels)} {value:.12g}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(buckets + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(
+                        f"{name}_bucket{_format_labels(label_names, labels, [('le', le)])} {cumulative}"
+                    )
+                lines.append(f"{name}_sum{_format_labels(label_names, labels)} {total:.9g}")
+                lines.append(f"{name}_count{_format_labels(label_names, labels)} {count}")
+
+    for name, (kind, help_text, value) in (extra or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value:.12g}")
+
+    return "\n".join(lines) + "\n"
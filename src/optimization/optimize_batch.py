@@ -0,0 +1,116 @@
+import numpy as np
+
+from optimization.generate_glp1_candidates import get_allowed_by_pos, iter_single_mutations
+from optimization.metrics import observe_candidates
+from optimization.optimize_glp1 import optimize_pareto, rank_mutations
+from optimization.optimize_ms import ms_mutant_features, rank_ms_mutations
+from optimization.parallel_scoring import score_glp1_codes, score_ms_features
+from optimization.score_glp1_sequence import mutant_codes
+from optimization.search_glp1_combinations import optimize_multi_mutations
+
+DISEASES = ("diabetes", "obesity", "ms")
+GLP1_DISEASES = ("diabetes", "obesity")
+
+# "potency": rank by the disease score; "pareto": GLP-1 potency vs. SCTR selectivity front
+OBJECTIVES = ("potency", "pareto")
+
+
+def validate_item(disease: str, max_mutations: int = 1, top_k: int = 5, objective: str = "potency"):
+    """Return an error message for an invalid request, or None."""
+    if disease not in DISEASES:
+        return f"Unknown disease type: {disease}"
+    if objective not in OBJECTIVES:
+        return f"Unknown objective: {objective}"
+    if objective == "pareto" and disease == "ms":
+        return "objective 'pareto' is only supported for GLP-1 (diabetes/obesity)"
+    if top_k < 1:
+        return "top_k must be at least 1"
+    if max_mutations < 1:
+        return "max_mutations must be at least 1"
+    if disease == "ms" and max_mutations > 1:
+        return "max_mutations > 1 is only supported for GLP-1 (diabetes/obesity)"
+    if max_mutations > 1 and max_mutations > len(get_allowed_by_pos()):
+        # Also bounds the memory the combination searches allocate
+        return f"max_mutations must be at most {len(get_allowed_by_pos())} (the number of mutable GLP-1 positions)"
+    return None
+
+
+def _split(values, sizes):
+    """Split a flat array into consecutive chunks of the given sizes."""
+    return np.split(values, np.cumsum(sizes)[:-1]) if sizes else []
+
+
+def optimize_batch(items):
+    """
+    Optimize many starting sequences with shared model passes.
+
+    items: list of dicts with keys "disease", "starting_sequence", "top_k"
+           and optionally "max_mutations" and "objective".
+
+    Items are grouped by model: all single-mutant GLP-1 candidates of a
+    disease are scored in one batched call, and all MS candidate feature
+    matrices are stacked and scored in one call (fanned out over worker
+    processes when PEPTIDE_SCORING_WORKERS is set, see parallel_scoring).
+    Multi-mutation and Pareto GLP-1 items go through their searches
+    individually.
+
+    Returns a list aligned with `items`; each entry is either
+    {"candidates": [...]} or {"error": "..."}, so one bad item does not
+    fail the others.
+    """
+    results = [None] * len(items)
+    glp1_groups = {d: [] for d in GLP1_DISEASES}  # disease -> [(i, seq, mutations)]
+    ms_group = []  # [(i, seq, mutations, X)]
+
+    for i, item in enumerate(items):
+        disease = str(item.get("disease", "")).lower()
+        seq = item.get("starting_sequence", "")
+        top_k = item.get("top_k", 5)
+        max_mutations = item.get("max_mutations", 1)
+        objective = item.get("objective", "potency")
+
+        error = validate_item(disease, max_mutations, top_k, objective)
+        if error is not None:
+            results[i] = {"error": error}
+            continue
+
+        try:
+            if disease == "ms":
+                mutations, X = ms_mutant_features(seq)
+                observe_candidates("ms", len(mutations))
+                ms_group.append((i, seq, mutations, X))
+            elif objective == "pareto":
+                results[i] = {"candidates": optimize_pareto(seq, top_k, max_mutations)}
+            elif max_mutations > 1:
+                results[i] = {"candidates": optimize_multi_mutations(seq, top_k, max_mutations)}
+            else:
+                mutations = list(iter_single_mutations(seq))
+                observe_candidates("glp1", len(mutations))
+                glp1_groups[disease].append((i, seq, mutations))
+        except Exception as e:
+            results[i] = {"error": f"{type(e).__name__}: {e}"}
+
+    # One scoring pass per GLP-1 disease group
+    for disease, group in glp1_groups.items():
+        if not group:
+            continue
+        try:
+            codes = np.vstack([mutant_codes(seq, muts) for _, seq, muts in group])
+            scores = score_glp1_codes(codes, disease)
+            for (i, seq, muts), chunk in zip(group, _split(scores, [len(m) for _, _, m in group])):
+                results[i] = {"candidates": rank_mutations(seq, muts, chunk, items[i].get("top_k", 5))}
+        except Exception as e:
+            for i, _, _ in group:
+                results[i] = {"error": f"{type(e).__name__}: {e}"}
+
+    # One scoring pass for every MS item
+    if ms_group:
+        try:
+            scores = score_ms_features(np.vstack([X for _, _, _, X in ms_group]))
+            for (i, seq, muts, _), chunk in zip(ms_group, _split(scores, [len(m) for _, _, m, _ in ms_group])):
+                results[i] = {"candidates": rank_ms_mutations(seq, muts, chunk, items[i].get("top_k", 5))}
+        except Exception as e:
+            for i, _, _, _ in ms_group:
+                results[i] = {"error": f"{type(e).__name__}: {e}"}
+
+    return results
@@ -1,69 +1,137 @@
 import os, sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from optimization.generate_glp1_candidates import generate_single_mutants
+import numpy as np
+
+from optimization.generate_glp1_candidates import apply_mutation, iter_single_mutations
+from optimization.metrics import observe_candidates, timed
+from optimization.ranking import non_dominated_sort, top_k_indices
 from optimization.score_glp1_sequence import (
-    score_sequence_for_diabetes,
-    score_sequence_for_obesity,
+    mutant_codes,
+    score_codes_for_objectives,
+    score_point_mutants_for_diabetes,
+    score_point_mutants_for_obesity,
+    score_sequences_for_objectives,
     BASE_GLP1,
 )
+from optimization.search_glp1_combinations import (
+    apply_mutations,
+    optimize_multi_mutations,
+    pareto_combinations,
+)
 
 
-def optimize_for_diabetes(start_seq: str = BASE_GLP1, top_k: int = 5):
+def rank_mutations(start_seq, mutations, scores, top_k):
+    """
+    Return the top_k (position, substitution) records as candidate dicts,
+    highest score first. Sequences are only built for the winners.
+    """
+    with timed("glp1.rank"):
+        return [
+            {
+                "sequence": apply_mutation(start_seq, *mutations[i]),
+                "position": mutations[i][0],
+                "substitution": mutations[i][1],
+                "score": float(scores[i]),
+            }
+            for i in top_k_indices(scores, top_k)
+        ]
+
+
+def optimize_for_diabetes(start_seq: str = BASE_GLP1, top_k: int = 5, max_mutations: int = 1):
     """
     Generate single-mutation candidates around start_seq
     and return the top_k sequences ranked by Diabetes score.
+    With max_mutations > 1, the exact top_k among all combinations of up
+    to max_mutations substitutions is returned instead.
     NOTE: We do NOT filter out negative scores – we always
     return up to top_k best candidates.
     """
-    candidates = generate_single_mutants(start_seq)
-    results = []
-
-    for cand in candidates:
-        seq = cand["sequence"]
-        score = score_sequence_for_diabetes(seq)
-        results.append(
-            {
-                "sequence": seq,
-                "position": cand["position"],
-                "substitution": cand["substitution"],
-                "score": float(score),
-            }
-        )
-
-    if not results:
-        return []
+    if max_mutations > 1:
+        with timed("glp1.search"):
+            return optimize_multi_mutations(start_seq, top_k, max_mutations)
 
-    # Sort highest to lowest, then slice top_k
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results[:top_k]
+    with timed("glp1.generate"):
+        mutations = list(iter_single_mutations(start_seq))
+    observe_candidates("glp1", len(mutations))
+    scores = score_point_mutants_for_diabetes(start_seq, mutations)
+    return rank_mutations(start_seq, mutations, scores, top_k)
 
 
-def optimize_for_obesity(start_seq: str = BASE_GLP1, top_k: int = 5):
+def optimize_for_obesity(start_seq: str = BASE_GLP1, top_k: int = 5, max_mutations: int = 1):
     """
     For now, obesity uses the same scoring as diabetes.
     Again: DO NOT filter negative scores.
     """
-    candidates = generate_single_mutants(start_seq)
-    results = []
+    if max_mutations > 1:
+        with timed("glp1.search"):
+            return optimize_multi_mutations(start_seq, top_k, max_mutations)
+
+    with timed("glp1.generate"):
+        mutations = list(iter_single_mutations(start_seq))
+    observe_candidates("glp1", len(mutations))
+    scores = score_point_mutants_for_obesity(start_seq, mutations)
+    return rank_mutations(start_seq, mutations, scores, top_k)
+
+
+def _pareto_order(objectives, top_k):
+    """Indices of the first top_k rows by potency, then selectivity (stable)."""
+    order = np.lexsort((-objectives[:, 1], -objectives[:, 0]))
+    return order[:top_k] if top_k is not None else order
+
+
+def optimize_pareto(start_seq: str = BASE_GLP1, top_k: int = 5, max_mutations: int = 1):
+    """
+    Pareto-front optimization for potency (the diabetes score) versus
+    selectivity (predicted SCTR penalty, higher = less off-target).
 
-    for cand in candidates:
-        seq = cand["sequence"]
-        score = score_sequence_for_obesity(seq)
-        results.append(
+    Returns the non-dominated candidates, best potency first, at most
+    top_k of them (all with top_k=None). Each candidate carries both
+    objectives: "score" (potency) and "selectivity".
+
+    Single mutants are scored for both objectives in one batched gather
+    and ranked with an O(n log n) non-dominated sort; with max_mutations
+    > 1 the front is built incrementally by pareto_combinations.
+    """
+    if max_mutations > 1:
+        with timed("glp1.search"):
+            _, combos = pareto_combinations(start_seq, max_mutations)
+            seqs = [apply_mutations(start_seq, muts) for muts in combos]
+            # Rescore the final sequences, as optimize_multi_mutations does
+            objectives = score_sequences_for_objectives(seqs)
+            keep = np.flatnonzero(non_dominated_sort(objectives) == 0)
+        return [
             {
-                "sequence": seq,
-                "position": cand["position"],
-                "substitution": cand["substitution"],
-                "score": float(score),
+                "sequence": seqs[i],
+                "mutations": [{"position": pos, "substitution": sub} for pos, sub in combos[i]],
+                "score": float(objectives[i, 0]),
+                "selectivity": float(objectives[i, 1]),
             }
-        )
+            for i in keep[_pareto_order(objectives[keep], top_k)]
+        ]
 
-    if not results:
+    with timed("glp1.generate"):
+        mutations = list(iter_single_mutations(start_seq))
+    observe_candidates("glp1", len(mutations))
+    if not mutations:
         return []
 
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results[:top_k]
+    with timed("glp1.encode"):
+        codes = mutant_codes(start_seq, mutations)
+    objectives = score_codes_for_objectives(codes)
+
+    with timed("glp1.rank"):
+        keep = np.flatnonzero(non_dominated_sort(objectives) == 0)
+        return [
+            {
+                "sequence": apply_mutation(start_seq, *mutations[i]),
+                "position": mutations[i][0],
+                "substitution": mutations[i][1],
+                "score": float(objectives[i, 0]),
+                "selectivity": float(objectives[i, 1]),
+            }
+            for i in keep[_pareto_order(objectives[keep], top_k)]
+        ]
 
 
 if __name__ == "__main__":
@@ -1,43 +1,83 @@
-import random
-from optimization.score_ms_sequence import score_sequence_for_ms
+import numpy as np
+
+from models.ms_features import ms_features, point_mutant_features
+from optimization.metrics import observe_candidates, timed
+from optimization.ranking import top_k_indices
+from optimization.parallel_scoring import score_ms_features
 
 AMINO_ACIDS = list("ACDEFGHIKLMNPQRSTVWY")
 
+
+def iter_ms_mutations(start_seq: str):
+    """
+    Lazily yield compact (position, residue) records for every
+    single-point mutant: all 20 amino acids at each position.
+    Positions are 1-based.
+    """
+    for i, current in enumerate(start_seq):
+        for aa in AMINO_ACIDS:
+            if current == aa:
+                continue
+            yield i + 1, aa
+
+
+def _apply(start_seq: str, position: int, residue: str) -> str:
+    return start_seq[:position - 1] + residue + start_seq[position:]
+
+
 def generate_ms_single_mutants(start_seq: str):
     """
     Generate simple single-point mutants for MS optimization.
     Try all 20 amino acids at each position.
+    Prefer iter_ms_mutations when full sequences are not needed.
     """
-    candidates = []
-    seq_list = list(start_seq)
+    return [_apply(start_seq, pos, aa) for pos, aa in iter_ms_mutations(start_seq)]
 
-    for i in range(len(seq_list)):
-        for aa in AMINO_ACIDS:
-            if seq_list[i] == aa:
-                continue
-            new_seq = seq_list.copy()
-            new_seq[i] = aa
-            candidates.append("".join(new_seq))
 
-    return candidates
+def _is_normalized(seq: str) -> bool:
+    """True when featurization (strip + upper-case) leaves `seq` unchanged."""
+    return seq.isascii() and seq == seq.strip().upper()
 
 
-def optimize_for_ms(start_seq: str, top_k: int = 5):
+def ms_mutant_features(start_seq: str):
     """
-    Generate MS-optimized sequences using MS-likeness score.
-    Returns top_k sequences with highest MS probability.
+    (position, residue) records of every single-point mutant of start_seq
+    and their MS feature matrix, with rows aligned to the records.
     """
-    candidates = generate_ms_single_mutants(start_seq)
+    if _is_normalized(start_seq):
+        # Every mutant differs from the parent at one position, so derive
+        # all feature vectors from the parent's composition in one pass
+        pos, sub, X = point_mutant_features(start_seq, "".join(AMINO_ACIDS))
+        mutations = list(zip((pos + 1).tolist(), map(chr, sub.tolist())))
+    else:
+        mutations = list(iter_ms_mutations(start_seq))
+        X = ms_features(_apply(start_seq, p, aa) for p, aa in mutations)
 
-    results = []
-    for seq in candidates:
-        score = score_sequence_for_ms(seq)
-        results.append({"sequence": seq, "score": score})
+    return mutations, X
+
+
+def rank_ms_mutations(start_seq, mutations, scores, top_k):
+    """
+    Return the top_k mutants as candidate dicts, highest MS score first.
+    Sequences are only built for the winners.
+    """
+    with timed("ms.rank"):
+        return [
+            {"sequence": _apply(start_seq, *mutations[i]), "score": float(scores[i])}
+            for i in top_k_indices(np.asarray(scores), top_k)
+        ]
 
-    # Sort by descending MS score
-    results.sort(key=lambda x: x["score"], reverse=True)
 
-    return results[:top_k]
+def optimize_for_ms(start_seq: str, top_k: int = 5):
+    """
+    Generate MS-optimized sequences using MS-likeness score.
+    Returns top_k sequences with highest MS probability.
+    """
+    with timed("ms.featurize"):
+        mutations, X = ms_mutant_features(start_seq)
+    observe_candidates("ms", len(mutations))
+    scores = score_ms_features(X)
+    return rank_ms_mutations(start_seq, mutations, scores, top_k)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from optimization import score_glp1_sequence, score_ms_sequence
+from optimization.score_cache import cached_scores, get_score_cache
+from optimization.score_glp1_sequence import GLP1Model
+
+# Worker processes for large scoring calls (0 = always score in-process)
+SCORING_WORKERS = int(os.environ.get("PEPTIDE_SCORING_WORKERS", "0"))
+
+# Below this many rows, shipping work to the pool costs more than it saves
+MIN_PARALLEL_ROWS = 20000
+
+# Blocks per worker; a few per worker even out uneven block costs
+BLOCKS_PER_WORKER = 2
+
+
+# ---------- SHARED ARRAYS ----------
+
+class SharedArray:
+    """
+    A NumPy array backed by a named shared-memory block, so worker
+    processes can read inputs and write results without pickling them.
+    """
+
+    def __init__(self, shm, shape, dtype, owner):
+        self.shm = shm
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        self._owner = owner
+
+    @classmethod
+    def create(cls, shape, dtype):
+        dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        return cls(shared_memory.SharedMemory(create=True, size=size), shape, dtype, owner=True)
+
+    @classmethod
+    def from_array(cls, values):
+        shared = cls.create(values.shape, values.dtype)
+        shared.array[...] = values
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        # Pool workers share the creating process's resource tracker, which
+        # forgets the block once the owner unlinks it
+        return cls(shared_memory.SharedMemory(name=name), shape, dtype, owner=False)
+
+    @property
+    def spec(self):
+        return self.shm.name, self.array.shape, self.array.dtype.str
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+# ---------- WORKERS ----------
+
+def _init_worker(glp1_snapshot, ms_snapshot):
+    """Process-pool initializer: install the parent's model versions once per worker."""
+    score_glp1_sequence.MODEL_SLOT.swap(glp1_snapshot)
+    score_ms_sequence.MODEL_SLOT.swap(ms_snapshot)
+
+
+# Scoring function per disease, run on a block of rows
+_KERNELS = {
+    "diabetes": score_glp1_sequence.score_codes_for_diabetes,
+    "obesity": score_glp1_sequence.score_codes_for_obesity,
+    "ms": score_ms_sequence.score_ms_features,
+}
+
+
+def _score_block(disease, in_spec, out_spec, start, stop):
+    """Worker: score rows [start, stop) of the shared input into the shared output."""
+    inputs, outputs = SharedArray.attach(in_spec), SharedArray.attach(out_spec)
+    try:
+        outputs.array[start:stop] = _KERNELS[disease](inputs.array[start:stop])
+    finally:
+        inputs.close()
+        outputs.close()
+    return stop - start
+
+
+# ---------- EXECUTOR ----------
+
+class ParallelScorer:
+    """
+    Scores large candidate matrices across a process pool.
+
+    Workers receive the GLP-1 effect table and MS model of the version
+    being served once, at start-up, and are restarted when a different
+    version is served. Inputs are copied once into shared memory, each
+    worker scores a contiguous block of rows and writes its scores into a
+    shared output array; only block bounds travel through the pool.
+
+    Parallel calls are serialized: each one already keeps every worker
+    busy, and a version change must not shut the pool down under another
+    caller.
+    """
+
+    def __init__(self, workers=None, min_rows=MIN_PARALLEL_ROWS):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_rows = min_rows
+        self._pool = None
+        self._versions = None
+        self._lock = threading.Lock()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get_pool(self):
+        glp1 = score_glp1_sequence.MODEL_SLOT.get()
+        ms = score_ms_sequence.MODEL_SLOT.get()
+        versions = (glp1.version, ms.version)
+        if self._pool is None or versions != self._versions:
+            self.close()
+            # Workers only need the effect tables, not the encoder/model
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(GLP1Model(glp1.version, glp1.directory, glp1.table, glp1.sctr_table), ms),
+            )
+            self._versions = versions
+        return self._pool
+
+    def _score(self, disease, inputs):
+        n = inputs.shape[0]
+        if n < self.min_rows or self.workers < 2:
+            return np.asarray(_KERNELS[disease](inputs), dtype=float)
+
+        with self._lock:
+            pool = self._get_pool()
+            shared_in = SharedArray.from_array(np.ascontiguousarray(inputs))
+            shared_out = SharedArray.create((n,), np.float64)
+            try:
+                step = math.ceil(n / (self.workers * BLOCKS_PER_WORKER))
+                futures = [
+                    pool.submit(_score_block, disease, shared_in.spec, shared_out.spec, start, min(start + step, n))
+                    for start in range(0, n, step)
+                ]
+                for future in futures:
+                    future.result()
+                return shared_out.array.copy()
+            finally:
+                shared_in.close()
+                shared_out.close()
+
+    def score_ms_features(self, X):
+        """Parallel score_ms_sequence.score_ms_features."""
+        return self._score("ms", np.asarray(X, dtype=float))
+
+    def score_glp1_codes(self, codes, disease="diabetes"):
+        """Parallel score_glp1_sequence.score_codes_for_<disease>."""
+        return self._score(disease, np.asarray(codes, dtype=np.uint8))
+
+
+_scorer = None
+
+
+def get_scorer():
+    """The shared ParallelScorer when PEPTIDE_SCORING_WORKERS > 1, else None."""
+    global _scorer
+    if _scorer is None and SCORING_WORKERS > 1:
+        _scorer = ParallelScorer(SCORING_WORKERS)
+    return _scorer
+
+
+def _score_ms_rows(X):
+    scorer = get_scorer()
+    return scorer.score_ms_features(X) if scorer is not None else score_ms_sequence.score_ms_features(X)
+
+
+def score_ms_features(X):
+    """
+    score_ms_features with each distinct feature row scored once, through
+    the persistent score cache, and fanned out over the shared scorer for
+    large matrices.
+
+    The MS model only sees the feature vector, so rows are cached by their
+    bytes under the served model version: point mutants with the same
+    substitution share a row whatever its position. In-memory models
+    (install_model) have no stable version and are not cached on disk.
+    """
+    snapshot = score_ms_sequence.MODEL_SLOT.get()
+    model = f"ms/{snapshot.version}" if snapshot.directory is not None else None
+    return cached_scores(X, _score_ms_rows, model, get_score_cache())
+
+
+def score_glp1_codes(codes, disease="diabetes"):
+    """score_codes_for_<disease>, fanned out over the shared scorer for large matrices."""
+    scorer = get_scorer()
+    return scorer.score_glp1_codes(codes, disease) if scorer is not None else _KERNELS[disease](codes)
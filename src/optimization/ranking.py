@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def top_k_indices(scores, k: int):
+    """
+    Indices of the k highest scores, best first.
+
+    Uses np.argpartition instead of a full sort. Ties keep their original
+    order, exactly like a stable `sort(reverse=True)` followed by `[:k]`.
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.intp)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+
+    # k-th largest score; everything above it is in, ties fill the rest in order
+    kth = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+
+    idx = np.concatenate([above, ties])
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def non_dominated_sort(objectives):
+    """
+    Pareto front of every row of an (n, 2) array of objectives to
+    maximize: 0 for non-dominated rows, 1 for rows only dominated by front
+    0, and so on. Runs in O(n log n) instead of comparing all pairs.
+
+    Rows are visited by decreasing first objective (ties by the second),
+    so everything that could dominate a row is placed before it. Within a
+    front, later members never have a smaller second objective, so a front
+    dominates a row iff its latest member does, and since fronts are
+    ordered, the row's front is found by binary search.
+    """
+    obj = np.asarray(objectives, dtype=float)
+    n = obj.shape[0]
+    fronts = np.empty(n, dtype=np.intp)
+
+    latest = []  # per front: objectives of its most recently placed member
+    for i in np.lexsort((-obj[:, 1], -obj[:, 0])).tolist():
+        a, b = obj[i, 0], obj[i, 1]
+        lo, hi = 0, len(latest)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            la, lb = latest[mid]
+            if lb > b or (lb == b and la > a):
+                lo = mid + 1  # front `mid` dominates the row
+            else:
+                hi = mid
+        if lo == len(latest):
+            latest.append((a, b))
+        else:
+            latest[lo] = (a, b)
+        fronts[i] = lo
+
+    return fronts
@@ -0,0 +1,69 @@
+import numpy as np
+
+from models.ms_features import ms_features
+from optimization.metrics import observe_candidates, timed
+from optimization.optimize_ms import ms_mutant_features
+from optimization.parallel_scoring import score_glp1_codes, score_ms_features
+from optimization.score_glp1_sequence import mutant_codes
+
+# Matrix columns, in order
+RESIDUES = "ACDEFGHIKLMNPQRSTVWY"
+_RESIDUE_COLUMN = np.full(256, -1, dtype=np.intp)
+_RESIDUE_COLUMN[np.frombuffer(RESIDUES.encode("ascii"), dtype=np.uint8)] = np.arange(len(RESIDUES))
+
+
+def scan_glp1(start_seq: str, disease: str = "diabetes"):
+    """
+    Scores of every single-point mutant of start_seq as a (L, 20) matrix
+    (row = 0-based position, column = residue in RESIDUES), plus the start
+    sequence's own score, which is what cells keeping the start residue
+    hold. Returns (start_score, matrix).
+    """
+    L = len(start_seq)
+    # Position 1 set to its own residue reproduces start_seq as row 0
+    records = [(1, start_seq[:1])] + [(pos, aa) for pos in range(1, L + 1) for aa in RESIDUES]
+    with timed("glp1.encode"):
+        codes = mutant_codes(start_seq, records)
+    observe_candidates("glp1", len(records) - 1)
+
+    scores = np.asarray(score_glp1_codes(codes, disease), dtype=float)
+    return float(scores[0]), scores[1:].reshape(L, len(RESIDUES))
+
+
+def scan_ms(start_seq: str):
+    """(start_score, (L, 20) matrix) of MS-likeness scores, laid out as in scan_glp1."""
+    with timed("ms.featurize"):
+        mutations, X = ms_mutant_features(start_seq)
+        X = np.vstack([ms_features([start_seq]), X])
+    observe_candidates("ms", len(mutations))
+    scores = score_ms_features(X)
+
+    matrix = np.full((len(start_seq), len(RESIDUES)), scores[0], dtype=float)
+    rows = np.fromiter((p - 1 for p, _ in mutations), dtype=np.intp, count=len(mutations))
+    cols = _RESIDUE_COLUMN[np.frombuffer("".join(aa for _, aa in mutations).encode("ascii"), dtype=np.uint8)]
+    matrix[rows, cols] = scores[1:]
+    return float(scores[0]), matrix
+
+
+def scan(disease: str, start_seq: str):
+    """
+    Saturation-mutagenesis scan: the full position x residue score
+    landscape of start_seq, computed in one batched scoring pass.
+
+    Returns {"residues": RESIDUES, "start_score": float, "scores": (L, 20)
+    float array}. For GLP-1, positions past the baseline peptide do not
+    affect the score and so repeat the start score.
+    """
+    if disease == "ms":
+        start_score, scores = scan_ms(start_seq)
+    else:
+        start_score, scores = scan_glp1(start_seq, disease)
+    return {"residues": RESIDUES, "start_score": start_score, "scores": scores}
+
+
+def scan_to_csv(start_seq: str, result) -> str:
+    """One row per position: position, start residue, then one score column per residue."""
+    lines = ["position,wild_type," + ",".join(result["residues"])]
+    for i, row in enumerate(result["scores"]):
+        lines.append(f"{i + 1},{start_seq[i]}," + ",".join(repr(float(v)) for v in row))
+    return "\n".join(lines) + "\n"
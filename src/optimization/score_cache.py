@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from optimization.metrics import inc, timed
+
+
+def _data_path(name: str) -> str:
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    return os.path.join(root, 'data', 'processed', name)
+
+
+# On-disk score cache shared by every worker process and kept across
+# restarts; PEPTIDE_SCORE_CACHE=0 turns it off
+SCORE_CACHE_PATH = os.environ.get("PEPTIDE_SCORE_CACHE", _data_path("score_cache.sqlite3"))
+
+# Keys per SELECT ... IN (...), below SQLite's bound-parameter limit
+_LOOKUP_CHUNK = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    model TEXT NOT NULL,
+    key BLOB NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (model, key)
+) WITHOUT ROWID
+"""
+
+
+class ScoreCache:
+    """
+    Persistent (model version, key) -> score store in a SQLite database
+    in WAL mode, so any number of processes can read while one writes.
+
+    The cache is best-effort: a lookup or write that fails (e.g. the
+    database stays locked) behaves like a miss or is skipped, and the
+    caller scores the rows itself.
+    """
+
+    def __init__(self, path: str = SCORE_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread, never reused by a forked child
+        conn, pid = getattr(self._local, "conn", (None, None))
+        if conn is None or pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Short busy timeout: waiting on another writer should not cost more
+            # than scoring the rows
+            conn = sqlite3.connect(self.path, timeout=1)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._local.conn = conn, os.getpid()
+        return conn
+
+    def get_many(self, model: str, keys):
+        """{key: score} for the keys cached under `model`."""
+        found = {}
+        try:
+            conn = self._connection()
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f"SELECT key, score FROM scores WHERE model = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk],
+                )
+                found.update(rows)
+        except sqlite3.Error:
+            return {}
+        return found
+
+    def put_many(self, model: str, keys, scores):
+        """Store the scores of `keys` under `model` in one transaction."""
+        try:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO scores (model, key, score) VALUES (?, ?, ?)",
+                    zip([model] * len(keys), keys, map(float, scores)),
+                )
+        except sqlite3.Error:
+            pass
+
+
+_cache = None
+
+
+def get_score_cache():
+    """The shared ScoreCache, or None when PEPTIDE_SCORE_CACHE=0."""
+    global _cache
+    if _cache is None and SCORE_CACHE_PATH not in ("", "0"):
+        _cache = ScoreCache(SCORE_CACHE_PATH)
+    return _cache
+
+
+def unique_rows(X):
+    """(distinct rows of X, inverse) with X == distinct[inverse], compared bytewise."""
+    X = np.ascontiguousarray(X)
+    rows = X.view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+    distinct, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+    return X[first], inverse
+
+
+def cached_scores(X, score_fn, model=None, cache=None, pipeline="ms"):
+    """
+    score_fn(X), scoring each distinct row of X once.
+
+    With a `model` key (e.g. "ms/v3") and a ScoreCache, distinct rows are
+    first looked up in the cache by their bytes; only the misses are
+    scored, in one score_fn call, and written back in bulk.
+    """
+    X = np.asarray(X)
+    if X.shape[0] == 0:
+        return np.asarray(score_fn(X), dtype=float)
+
+    distinct, inverse = unique_rows(X)
+    scores = np.empty(distinct.shape[0], dtype=float)
+    todo = np.arange(distinct.shape[0])
+
+    if model is not None and cache is not None:
+        keys = [row.tobytes() for row in distinct]
+        with timed(f"{pipeline}.score_cache"):
+            found = cache.get_many(model, keys)
+        if found:
+            hit = np.fromiter((k in found for k in keys), dtype=bool, count=len(keys))
+            scores[hit] = [found[k] for k, h in zip(keys, hit) if h]
+            todo = np.flatnonzero(~hit)
+        inc("peptide_score_cache_lookups_total", "hit", amount=len(keys) - len(todo))
+        inc("peptide_score_cache_lookups_total", "miss", amount=len(todo))
+
+    if len(todo):
+        scores[todo] = score_fn(distinct[todo])
+        if model is not None and cache is not None:
+            with timed(f"{pipeline}.score_cache"):
+                cache.put_many(model, [keys[i] for i in todo], scores[todo])
+
+    return scores[inverse]
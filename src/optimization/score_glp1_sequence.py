@@ -1,13 +1,30 @@
 import os
+import hashlib
+import logging
+import time
 import numpy as np
 
+from models.pipeline import file_digest
+from models.registry import ModelSlot, locate_artifacts
+from optimization.metrics import record_model_load, timed
+
+logger = logging.getLogger(__name__)
+
 # --- 1. Define the baseline GLP-1 sequence ---
 # Human GLP-1 (7-36)
 BASE_GLP1 = "HAEGTFTSDVSSYLEGQAAKEFIAWLVKGR"
 
-# Module-level cache for lazy-loaded encoder & model
-_encoder = None
-_model = None
+# Effect-table columns: the 20 standard residues, plus one trailing column
+# for anything else (the encoder ignores unknown substitutions).
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+OTHER_COLUMN = len(AMINO_ACIDS)
+
+# Byte -> effect-table column lookup
+_RESIDUE_INDEX = np.full(256, OTHER_COLUMN, dtype=np.intp)
+for _i, _aa in enumerate(AMINO_ACIDS):
+    _RESIDUE_INDEX[ord(_aa)] = _i
+
+_BASE_CODES = np.frombuffer(BASE_GLP1.encode("ascii"), dtype=np.uint8)
 
 
 def _data_path(name: str) -> str:
@@ -16,14 +33,35 @@ def _data_path(name: str) -> str:
     return os.path.join(root, 'data', 'processed', name)
 
 
-def _load_encoder_and_model():
+ENCODER_FILE = 'glp1_encoder.pkl'
+MODEL_FILE = 'model_glp1_diabetes_rf.pkl'
+EFFECT_TABLE_FILE = 'glp1_effect_table.npz'
+
+# Off-target (SCTR) model: predicts SCTR_penalty, higher = more selective
+SCTR_MODEL_FILE = 'model_glp1_sctr_rf.pkl'
+SCTR_TABLE_FILE = 'glp1_sctr_effect_table.npz'
+
+# Version label served when no trained artifacts exist
+FALLBACK_VERSION = "fallback"
+
+
+def _artifact_path(directory, name):
+    return os.path.join(directory, name) if directory else _data_path(name)
+
+
+def _load_encoder_and_model(directory=None, model_file=MODEL_FILE):
     """
-    Lazy-load encoder and model. Raises ImportError with helpful message
-    if required packages are missing.
+    Load encoder and model from `directory` (default: the version being
+    served). Returns (None, None) when the files are missing. Raises
+    ImportError with helpful message if required packages are missing.
     """
-    global _encoder, _model
-    if _encoder is not None and _model is not None:
-        return _encoder, _model
+    if directory is None and model_file == MODEL_FILE:
+        snapshot = MODEL_SLOT.get()
+        if snapshot.encoder is not None and snapshot.model is not None:
+            return snapshot.encoder, snapshot.model
+        directory = snapshot.directory
+    elif directory is None:
+        directory = MODEL_SLOT.get().directory
 
     try:
         import joblib
@@ -39,22 +77,25 @@ def _load_encoder_and_model():
         # Allow joblib to load a persisted encoder even if source class is unavailable
         GLP1FeatureEncoder = None
 
-    ENCODER_PATH = _data_path('glp1_encoder.pkl')
-    MODEL_PATH = _data_path('model_glp1_diabetes_rf.pkl')
+    ENCODER_PATH = _artifact_path(directory, ENCODER_FILE)
+    MODEL_PATH = _artifact_path(directory, model_file)
 
     try:
-        _encoder = joblib.load(ENCODER_PATH)
-        _model = joblib.load(MODEL_PATH)
+        t0 = time.perf_counter()
+        encoder = joblib.load(ENCODER_PATH)
+        # Prefer the NumPy-only compiled forest when it matches the pickle
+        from models.compiled_forest import load_compiled_if_current
+        model = load_compiled_if_current(MODEL_PATH) or joblib.load(MODEL_PATH)
+        record_model_load("glp1" if model_file == MODEL_FILE else "glp1_sctr", time.perf_counter() - t0)
     except FileNotFoundError:
         # Model files are not present — return None to allow a graceful fallback.
-        _encoder, _model = None, None
-        return _encoder, _model
+        return None, None
     except Exception as e:
         raise RuntimeError(
             f"Failed to load encoder/model from '{ENCODER_PATH}' and '{MODEL_PATH}': {e}"
         ) from e
 
-    return _encoder, _model
+    return encoder, model
 
 
 # --- 3. Extract mutations from a user sequence ---
@@ -76,43 +117,320 @@ def extract_mutations(seq, base_seq=BASE_GLP1):
     return mutations
 
 
-# --- 4. Score sequence for diabetes ---
-def score_sequence_for_diabetes(seq):
-    mutations = extract_mutations(seq)
+# Residues often considered favorable for peptide activity (fallback only)
+_HOT = set(list("AEKYFW"))
 
-    if not mutations:
-        return 0.0  # identical to baseline → neutral effect
 
-    # Ensure encoder & model are available
-    encoder, model = _load_encoder_and_model()
+def _fallback_effect(pos, sub):
+    """
+    Fallback heuristic when trained models are not available.
+    Deterministic simple scoring: give a modest boost for substitutions
+    to residues often considered favorable for peptide activity.
+    """
+    base_len = len(BASE_GLP1)
+    pos_norm = (pos - 1) / max(1, base_len - 1)
+    weight = 1.0 - pos_norm  # earlier positions slightly more important
+    bonus = 1.0 if sub in _HOT else 0.2
+    return weight * bonus * 0.1
+
 
-    if encoder is None or model is None:
-        # Fallback heuristic when trained models are not available.
-        # Deterministic simple scoring: give a modest boost for substitutions
-        # to residues often considered favorable for peptide activity.
-        HOT = set(list("AEKYFW"))
-        base_len = len(BASE_GLP1)
-        score = 0.0
-        for pos, sub in mutations:
-            pos_norm = (pos - 1) / max(1, base_len - 1)
-            weight = 1.0 - pos_norm  # earlier positions slightly more important
-            bonus = 1.0 if sub in HOT else 0.2
-            score += weight * bonus * 0.1
-
-        return float(score)
-
-    # Build a temporary dataframe to feed the encoder
+# --- 4. Precomputed (position x residue) effect table ---
+def model_version(directory=None, model_file=MODEL_FILE):
+    """
+    Fingerprint of the encoder + model artifacts (sha256 of their contents)
+    in `directory` (default data/processed), or None when either file is
+    missing. Used to validate the cached effect table; unaffected by the
+    file times a checkout or copy assigns.
+    """
+    h = hashlib.sha1()
+    h.update(BASE_GLP1.encode("ascii"))
+    h.update(AMINO_ACIDS.encode("ascii"))
+    for name in (ENCODER_FILE, model_file):
+        digest = file_digest(_artifact_path(directory, name))
+        if digest is None:
+            return None
+        h.update(f"{name}:{digest}".encode("ascii"))
+    return h.hexdigest()
+
+
+def build_effect_table(encoder, model):
+    """
+    Predict the effect of every (position, residue) pair on BASE_GLP1
+    in a single model call.
+
+    Returns a float array of shape (len(BASE_GLP1), 21): one column per
+    residue in AMINO_ACIDS plus a trailing column for unknown residues.
+    Wild-type cells are zero, since an unchanged residue is not a mutation.
+    """
     import pandas as pd
-    df = pd.DataFrame(mutations, columns=["Position", "Substitution"])
+
+    L = len(BASE_GLP1)
+    # "<other>" is never an encoder category, so it one-hot encodes to zeros
+    residues = list(AMINO_ACIDS) + ["<other>"]
+    df = pd.DataFrame(
+        [(pos, sub) for pos in range(1, L + 1) for sub in residues],
+        columns=["Position", "Substitution"],
+    )
 
     X = encoder.transform(df)
-    preds = model.predict(X)
+    table = model.predict(X).reshape(L, len(residues))
+    table[np.arange(L), _RESIDUE_INDEX[_BASE_CODES]] = 0.0
+    return table
+
+
+def _build_fallback_table():
+    """Effect table for the heuristic used when no trained model exists."""
+    L = len(BASE_GLP1)
+    residues = list(AMINO_ACIDS) + [None]
+    table = np.array(
+        [[_fallback_effect(pos, sub) for sub in residues] for pos in range(1, L + 1)]
+    )
+    table[np.arange(L), _RESIDUE_INDEX[_BASE_CODES]] = 0.0
+    return table
+
+
+def save_effect_table(table, version, path=None):
+    """Persist the effect table next to the encoder, tagged with the model version."""
+    path = path or _data_path(EFFECT_TABLE_FILE)
+    np.savez(path, table=table, model_version=np.array(version))
+
+
+def _read_effect_table(version, path=None):
+    """Return the persisted table if it matches `version`, else None."""
+    path = path or _data_path(EFFECT_TABLE_FILE)
+    try:
+        with np.load(path) as data:
+            if str(data["model_version"]) != version:
+                return None
+            table = data["table"]
+    except Exception:
+        # Missing, stale-format or corrupt table → caller rebuilds it
+        return None
+
+    if table.shape != (len(BASE_GLP1), len(AMINO_ACIDS) + 1):
+        return None
+    return table
+
+
+class GLP1Model:
+    """One loaded version of the GLP-1 artifacts, as served by MODEL_SLOT."""
+
+    def __init__(self, version, directory, table, sctr_table=None, encoder=None, model=None):
+        self.version = version
+        self.directory = directory
+        self.table = table
+        # Without an SCTR model every candidate is equally selective
+        self.sctr_table = np.zeros_like(table) if sctr_table is None else sctr_table
+        # (L, 21, 2) potency + selectivity effects, gathered in one pass
+        self.objective_table = np.stack([self.table, self.sctr_table], axis=-1)
+        # Only set when the table had to be rebuilt (or for installed models)
+        self.encoder = encoder
+        self.model = model
+
+
+def _locate():
+    """(version label, directory): the active registry version, else data/processed."""
+    version, directory = locate_artifacts("glp1")
+    if version is None:
+        fingerprint = model_version(directory)
+        sctr = model_version(directory, SCTR_MODEL_FILE)
+        version = (
+            hashlib.sha1(f"{fingerprint}:{sctr}".encode("ascii")).hexdigest()[:12]
+            if fingerprint else FALLBACK_VERSION
+        )
+    return version, directory
+
+
+def _load_table(directory, model_file, table_file):
+    """
+    Effect table of `model_file` in `directory`, plus the encoder and
+    model when they had to be loaded to rebuild it.
+
+    The table is read from disk when its recorded model fingerprint
+    matches the artifacts; otherwise it is rebuilt from the model in
+    memory. Artifacts are never rewritten while serving (training writes
+    the tables). Returns (None, None, None) without model files.
+    """
+    fingerprint = model_version(directory, model_file)
+    table_path = _artifact_path(directory, table_file)
+    table = _read_effect_table(fingerprint, table_path) if fingerprint is not None else None
+    if table is not None:
+        return table, None, None
+
+    encoder, model = _load_encoder_and_model(directory, model_file)
+    if encoder is None or model is None:
+        return None, None, None
+
+    logger.warning("Effect table %s is missing or stale; rebuilding it in memory "
+                   "(re-run models/train_glp1_models.py to refresh it)", table_path)
+    return build_effect_table(encoder, model), encoder, model
+
+
+def _load(version, directory):
+    """
+    Load the potency and selectivity effect tables of the artifacts in
+    `directory`. Without model files, the fallback heuristic is tabulated.
+    """
+    t0 = time.perf_counter()
+    table, encoder, model = _load_table(directory, MODEL_FILE, EFFECT_TABLE_FILE)
+    if table is None:
+        table = _build_fallback_table()
+    sctr_table, _, _ = _load_table(directory, SCTR_MODEL_FILE, SCTR_TABLE_FILE)
+
+    record_model_load("glp1_effect_table", time.perf_counter() - t0)
+    return GLP1Model(version, directory, table, sctr_table, encoder, model)
+
 
-    # Sum the effects from each mutation
-    return float(np.sum(preds))
+# Serving slot: lazily loaded on first use, swapped by reload_model()
+MODEL_SLOT = ModelSlot("glp1", _locate, _load)
 
 
-# --- 5. Score sequence for obesity ---
+def get_effect_table():
+    """The (position x residue) effect table of the model version being served."""
+    return MODEL_SLOT.get().table
+
+
+def get_objective_table():
+    """(L, 21, 2) potency and selectivity effects of the model version being served."""
+    return MODEL_SLOT.get().objective_table
+
+
+def reload_model(warm=None):
+    """Swap in the active registry version if it changed; returns the served GLP1Model."""
+    return MODEL_SLOT.reload(warm)
+
+
+def install_model(encoder, model, version="custom", sctr_model=None):
+    """Serve an in-memory encoder/model pair (e.g. synthetic benchmark models)."""
+    sctr_table = build_effect_table(encoder, sctr_model) if sctr_model is not None else None
+    snapshot = GLP1Model(
+        version, None, build_effect_table(encoder, model), sctr_table, encoder, model
+    )
+    MODEL_SLOT.swap(snapshot)
+    return snapshot
+
+
+def residue_column(residue):
+    """Effect-table column for a one-letter residue (unknown → OTHER_COLUMN)."""
+    col = AMINO_ACIDS.find(residue) if len(residue) == 1 else -1
+    return OTHER_COLUMN if col < 0 else col
+
+
+def _encode_against_base(seqs):
+    """
+    Encode sequences as a (n, len(BASE_GLP1)) uint8 matrix.
+    Short sequences are padded with the baseline residues and long ones
+    truncated, matching `extract_mutations` (only the overlap is compared).
+    """
+    L = len(BASE_GLP1)
+    padded = "".join(s[:L] if len(s) >= L else s + BASE_GLP1[len(s):] for s in seqs)
+    codes = np.frombuffer(padded.encode("ascii", "replace"), dtype=np.uint8)
+    return codes.reshape(len(seqs), L)
+
+
+def mutant_codes(start_seq, mutations):
+    """
+    Encoded (n, len(BASE_GLP1)) matrix of the single-point mutants of
+    start_seq given by 1-based (position, substitution) records, built
+    without materializing the mutant strings.
+    """
+    positions = np.fromiter((p for p, _ in mutations), dtype=np.intp, count=len(mutations))
+    residues = np.frombuffer(
+        "".join(s for _, s in mutations).encode("ascii", "replace"), dtype=np.uint8
+    )
+
+    codes = np.repeat(_encode_against_base([start_seq]), len(mutations), axis=0)
+
+    # Positions past the baseline are truncated away, as in extract_mutations
+    inside = positions <= codes.shape[1]
+    codes[np.flatnonzero(inside), positions[inside] - 1] = residues[inside]
+    return codes
+
+
+# --- 5. Score sequences for diabetes (batched) ---
+def score_codes_for_diabetes(codes):
+    """
+    Score an encoded candidate matrix (see _encode_against_base / mutant_codes).
+
+    The model is additive over independent (position, substitution)
+    effects, so scoring is a gather from the precomputed effect table
+    followed by a per-sequence sum.
+    """
+    table = get_effect_table()
+
+    with timed("glp1.inference"):
+        # Wild-type cells are zero, so unchanged positions add nothing
+        effects = table[np.arange(codes.shape[1]), _RESIDUE_INDEX[codes]]
+        return effects.sum(axis=1)
+
+
+def score_sequences_for_diabetes(seqs):
+    """
+    Score many sequences in one pass. Returns a float numpy array
+    aligned with `seqs`.
+    """
+    seqs = list(seqs)
+    if not seqs:
+        return np.zeros(0, dtype=float)
+
+    with timed("glp1.encode"):
+        codes = _encode_against_base(seqs)
+    return score_codes_for_diabetes(codes)
+
+
+def score_point_mutants_for_diabetes(start_seq, mutations):
+    """Scores of the single-point mutants of start_seq given as (position, substitution) records."""
+    mutations = list(mutations)
+    if not mutations:
+        return np.zeros(0, dtype=float)
+
+    with timed("glp1.encode"):
+        codes = mutant_codes(start_seq, mutations)
+    return score_codes_for_diabetes(codes)
+
+
+def score_sequence_for_diabetes(seq):
+    return float(score_sequences_for_diabetes([seq])[0])
+
+
+# --- 6. Potency and selectivity together ---
+def score_codes_for_objectives(codes):
+    """
+    (n, 2) matrix of [potency, selectivity] scores for an encoded
+    candidate matrix, gathered from both effect tables in one pass.
+    Potency is the diabetes score; selectivity sums the predicted SCTR
+    penalties, so higher means less off-target activity.
+    """
+    table = get_objective_table()
+
+    with timed("glp1.inference"):
+        effects = table[np.arange(codes.shape[1]), _RESIDUE_INDEX[codes]]
+        return effects.sum(axis=1)
+
+
+def score_sequences_for_objectives(seqs):
+    seqs = list(seqs)
+    if not seqs:
+        return np.zeros((0, 2), dtype=float)
+
+    with timed("glp1.encode"):
+        codes = _encode_against_base(seqs)
+    return score_codes_for_objectives(codes)
+
+
+# --- 7. Score sequence for obesity ---
 # For now: same as Diabetes (later we modify weighting)
+def score_codes_for_obesity(codes):
+    return score_codes_for_diabetes(codes)
+
+
+def score_sequences_for_obesity(seqs):
+    return score_sequences_for_diabetes(seqs)
+
+
+def score_point_mutants_for_obesity(start_seq, mutations):
+    return score_point_mutants_for_diabetes(start_seq, mutations)
+
+
 def score_sequence_for_obesity(seq):
     return score_sequence_for_diabetes(seq)
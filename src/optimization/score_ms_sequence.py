@@ -1,8 +1,11 @@
 import os
+import hashlib
+import time
 import numpy as np
 
-# Lazy-load model and helper
-_model_ms = None
+from models.pipeline import file_digest
+from models.registry import ModelSlot, locate_artifacts
+from optimization.metrics import record_model_load, timed
 
 
 def _data_path(name: str) -> str:
@@ -10,33 +13,125 @@ def _data_path(name: str) -> str:
     return os.path.join(root, 'data', 'processed', name)
 
 
-def _load_model_ms():
-    global _model_ms
-    if _model_ms is not None:
-        return _model_ms
+MODEL_FILE = 'model_ms_rf.pkl'
+
+# Version label served when no trained model exists
+FALLBACK_VERSION = "fallback"
+
+
+def _artifact_path(directory, name):
+    return os.path.join(directory, name) if directory else _data_path(name)
+
+
+def model_version(directory=None):
+    """
+    Fingerprint of the MS model artifact (sha256 of its contents) in
+    `directory` (default data/processed), or None when the file is missing.
+    """
+    digest = file_digest(_artifact_path(directory, MODEL_FILE))
+    if digest is None:
+        return None
+    return hashlib.sha1(f"{MODEL_FILE}:{digest}".encode("ascii")).hexdigest()
+
+
+class MSModel:
+    """One loaded version of the MS model, as served by MODEL_SLOT."""
+
+    def __init__(self, version, directory, model):
+        self.version = version
+        self.directory = directory
+        self.model = model
+
+
+def _locate():
+    """(version label, directory): the active registry version, else data/processed."""
+    version, directory = locate_artifacts("ms")
+    if version is None:
+        fingerprint = model_version(directory)
+        version = fingerprint[:12] if fingerprint else FALLBACK_VERSION
+    return version, directory
+
+
+def _load(version, directory):
+    MODEL_PATH = _artifact_path(directory, MODEL_FILE)
+    t0 = time.perf_counter()
+
+    # Prefer the NumPy-only compiled forest when it matches the pickle
+    from models.compiled_forest import load_compiled_if_current
+    model = load_compiled_if_current(MODEL_PATH)
+    if model is not None:
+        record_model_load("ms", time.perf_counter() - t0)
+        return MSModel(version, directory, model)
 
     try:
         import joblib
     except Exception as e:
         raise ImportError("Missing dependency 'joblib'. Add it to requirements.txt and redeploy.") from e
 
-    MODEL_PATH = _data_path('model_ms_rf.pkl')
     try:
-        _model_ms = joblib.load(MODEL_PATH)
+        model = joblib.load(MODEL_PATH)
     except FileNotFoundError:
         # Model not present — allow fallback behavior in the caller
-        _model_ms = None
-        return _model_ms
+        return MSModel(version, directory, None)
     except Exception as e:
         raise RuntimeError(f"Failed to load MS model from '{MODEL_PATH}': {e}") from e
 
-    return _model_ms
+    record_model_load("ms", time.perf_counter() - t0)
+    return MSModel(version, directory, model)
 
 
-def score_sequence_for_ms(seq: str) -> float:
+# Serving slot: lazily loaded on first use, swapped by reload_model()
+MODEL_SLOT = ModelSlot("ms", _locate, _load)
+
+
+def _load_model_ms():
+    """The MS model being served, or None when no trained model exists."""
+    return MODEL_SLOT.get().model
+
+
+def reload_model(warm=None):
+    """Swap in the active registry version if it changed; returns the served MSModel."""
+    return MODEL_SLOT.reload(warm)
+
+
+def install_model(model, version="custom"):
+    """Serve an in-memory MS model (e.g. a synthetic benchmark model)."""
+    snapshot = MSModel(version, None, model)
+    MODEL_SLOT.swap(snapshot)
+    return snapshot
+
+
+def score_ms_features(X) -> np.ndarray:
     """
-    Returns MS-likeness probability (0 to 1).
-    Higher = more similar to glatiramer / IL-10 / IL-23 peptides.
+    Score a precomputed MS feature matrix (see models.ms_features) in one
+    model call. Returns MS-likeness probabilities aligned with the rows of X.
+    """
+    X = np.asarray(X)
+    if X.shape[0] == 0:
+        return np.zeros(0, dtype=float)
+
+    model_ms = _load_model_ms()
+
+    with timed("ms.inference"):
+        if model_ms is None:
+            # Fallback deterministic heuristic mapped to [0,1].
+            # Use a simple logistic on a linear combination of features so output
+            # looks like a probability but requires no model files.
+            # Feature vector: [length, frac_A, frac_E, frac_K, frac_Y, frac_pos, frac_neg, hydro]
+            length, frac_A, frac_E, frac_K, frac_Y, frac_pos, frac_neg, hydro = X.T
+            score_lin = (
+                1.2 * frac_A + 1.5 * frac_E + 1.3 * frac_K + 0.8 * frac_Y
+                - 0.01 * length + 0.5 * frac_pos - 0.3 * frac_neg + 0.2 * hydro
+            )
+            return 1.0 / (1.0 + np.exp(-score_lin))
+
+        return model_ms.predict_proba(X)[:, 1]   # probability of class=1
+
+
+def score_sequences_for_ms(seqs) -> np.ndarray:
+    """
+    Batched MS-likeness scoring: featurize all sequences at once and
+    make a single model call.
     """
     # load helper features function lazily
     try:
@@ -44,24 +139,14 @@ def score_sequence_for_ms(seq: str) -> float:
     except Exception as e:
         raise ImportError("Missing or broken `models.ms_features`. Ensure dependencies are installed.") from e
 
-    model_ms = _load_model_ms()
+    with timed("ms.featurize"):
+        X = ms_features(seqs)
+    return score_ms_features(X)
+
 
-    X = ms_features([seq])  # single-sample inference
-
-    if model_ms is None:
-        # Fallback deterministic heuristic mapped to [0,1].
-        # Use a simple logistic on a linear combination of features so output
-        # looks like a probability but requires no model files.
-        import math
-        feats = X[0]
-        # Feature vector: [length, frac_A, frac_E, frac_K, frac_Y, frac_pos, frac_neg, hydro]
-        length, frac_A, frac_E, frac_K, frac_Y, frac_pos, frac_neg, hydro = feats
-        score_lin = (
-            1.2 * frac_A + 1.5 * frac_E + 1.3 * frac_K + 0.8 * frac_Y
-            - 0.01 * length + 0.5 * frac_pos - 0.3 * frac_neg + 0.2 * hydro
-        )
-        prob = 1.0 / (1.0 + math.exp(-score_lin))
-        return float(prob)
-
-    prob = model_ms.predict_proba(X)[0, 1]   # probability of class=1
-    return float(prob)
+def score_sequence_for_ms(seq: str) -> float:
+    """
+    Returns MS-likeness probability (0 to 1).
+    Higher = more similar to glatiramer / IL-10 / IL-23 peptides.
+    """
+    return float(score_sequences_for_ms([seq])[0])
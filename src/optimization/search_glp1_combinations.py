@@ -0,0 +1,221 @@
+import heapq
+
+import numpy as np
+
+from optimization.generate_glp1_candidates import get_allowed_by_pos
+from optimization.ranking import non_dominated_sort
+from optimization.score_glp1_sequence import (
+    BASE_GLP1,
+    get_effect_table,
+    get_objective_table,
+    score_sequences_for_diabetes,
+    score_sequences_for_objectives,
+    residue_column,
+)
+
+# Slack for floating-point error when comparing bounds against the heap
+_EPS = 1e-12
+
+
+def _position_deltas(start_seq: str, table):
+    """
+    For every mutable position, yield (position, substitutions, deltas),
+    where deltas[i] is the change of each table column (score, or
+    objective vector) from applying substitutions[i] to start_seq. Only
+    simple one-letter substitutions that appear in the GLP-1 dataset are
+    used, as in generate_single_mutants.
+    """
+    for pos, subs in sorted(get_allowed_by_pos().items()):
+        idx = pos - 1  # convert 1-based to 0-based index
+        if idx < 0 or idx >= len(start_seq):
+            continue
+
+        current = start_seq[idx]
+        subs = [sub for sub in subs if len(sub) == 1 and sub != current]
+        if not subs:
+            continue
+
+        # Positions past the baseline never count as mutations
+        if idx < len(BASE_GLP1):
+            row = table[idx]
+            deltas = row[[residue_column(sub) for sub in subs]] - row[residue_column(current)]
+        else:
+            deltas = np.zeros((len(subs),) + table.shape[2:])
+
+        yield pos, subs, deltas
+
+
+def _position_options(start_seq: str, table):
+    """
+    For every mutable position, list (delta, substitution) pairs sorted
+    from best to worst, where delta is the score change of applying that
+    substitution to start_seq.
+    """
+    options = []
+    for pos, subs, deltas in _position_deltas(start_seq, table):
+        opts = [(float(delta), sub) for delta, sub in zip(deltas, subs)]
+        opts.sort(key=lambda o: o[0], reverse=True)
+        options.append((pos, opts))
+
+    return options
+
+
+def _suffix_bounds(best, max_mutations):
+    """
+    suffix[j][r] = largest gain from at most r further mutations chosen
+    among positions j.., i.e. the sum of the r largest positive bests.
+    """
+    P = len(best)
+    suffix = np.zeros((P + 1, max_mutations + 1))
+    for j in range(P):
+        gains = sorted((b for b in best[j:] if b > 0), reverse=True)[:max_mutations]
+        suffix[j, 1:len(gains) + 1] = np.cumsum(gains)
+        suffix[j, len(gains) + 1:] = suffix[j, len(gains)]
+    return suffix
+
+
+def top_k_combinations(start_seq: str = BASE_GLP1, top_k: int = 5, max_mutations: int = 2):
+    """
+    Exact top_k candidates among all combinations of 1..max_mutations
+    substitutions at distinct positions of start_seq.
+
+    The GLP-1 score is additive over mutations, so a candidate's score is
+    the start score plus the per-position deltas it applies. A depth-first
+    branch-and-bound search visits options best-first and prunes any
+    subtree whose optimistic bound cannot beat the current k-th best,
+    so the combinatorial space is never scored in full.
+
+    Returns a list of (score, [(position, substitution), ...]) pairs,
+    best first.
+    """
+    if top_k <= 0 or max_mutations <= 0:
+        return []
+
+    table = get_effect_table()
+    start_score = float(score_sequences_for_diabetes([start_seq])[0])
+
+    options = _position_options(start_seq, table)
+    if not options:
+        return []
+
+    # No candidate can mutate more positions than there are
+    max_mutations = min(max_mutations, len(options))
+    best = [opts[0][0] for _, opts in options]
+    suffix = _suffix_bounds(best, max_mutations)
+
+    # Min-heap of (score, -order, mutations); among equal scores the
+    # earliest-found candidate is kept
+    heap = []
+    counter = [0]
+
+    def threshold():
+        return heap[0][0] if len(heap) >= top_k else -np.inf
+
+    def visit(first, score, chosen, remaining):
+        for j in range(first, len(options)):
+            # Nothing reachable from positions j.. can enter the heap
+            if score + suffix[j, remaining] + _EPS <= threshold():
+                break
+
+            pos, opts = options[j]
+            for delta, sub in opts:
+                new_score = score + delta
+                if new_score + suffix[j + 1, remaining - 1] + _EPS <= threshold():
+                    break  # options are sorted, the rest are worse
+
+                mutations = chosen + ((pos, sub),)
+                entry = (new_score, -counter[0], mutations)
+                counter[0] += 1
+                if len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                elif new_score > heap[0][0]:
+                    heapq.heapreplace(heap, entry)
+
+                if remaining > 1:
+                    visit(j + 1, new_score, mutations, remaining - 1)
+
+    visit(0, start_score, (), max_mutations)
+
+    ranked = sorted(heap, key=lambda e: (-e[0], -e[1]))
+    return [(score, list(mutations)) for score, _, mutations in ranked]
+
+
+def _non_dominated(objectives, mutations):
+    keep = np.flatnonzero(non_dominated_sort(objectives) == 0)
+    return objectives[keep], [mutations[i] for i in keep]
+
+
+def pareto_combinations(start_seq: str = BASE_GLP1, max_mutations: int = 2):
+    """
+    Non-dominated (potency, selectivity) designs among all combinations
+    of 1..max_mutations substitutions at distinct positions of start_seq.
+
+    Both objectives are additive over mutations, so a set dominated by
+    another set of the same size over the same positions cannot lead to
+    a non-dominated design. The front is built position by position:
+    fronts[m] keeps the non-dominated m-mutation sets seen so far, and
+    each position extends fronts[m - 1] with all of its options before
+    pruning. The combinatorial space is never enumerated in full.
+
+    Returns (objectives, mutations): an (n, 2) array and the aligned
+    lists of (position, substitution) pairs.
+    """
+    if max_mutations <= 0:
+        return np.zeros((0, 2)), []
+
+    table = get_objective_table()
+    start = score_sequences_for_objectives([start_seq])[0]
+
+    positions = list(_position_deltas(start_seq, table))
+    max_mutations = min(max_mutations, len(positions))
+
+    # fronts[m] = (objectives (n, 2), [mutation tuples])
+    fronts = [(start[None, :], [()])] + [(np.zeros((0, 2)), []) for _ in range(max_mutations)]
+
+    for pos, subs, deltas in positions:
+        for m in range(max_mutations, 0, -1):
+            base_obj, base_muts = fronts[m - 1]
+            if not base_muts:
+                continue
+            extended = (base_obj[:, None, :] + deltas[None, :, :]).reshape(-1, 2)
+            muts = [chosen + ((pos, sub),) for chosen in base_muts for sub in subs]
+            obj, kept = fronts[m]
+            fronts[m] = _non_dominated(np.vstack([obj, extended]), kept + muts)
+
+    objectives = np.vstack([fronts[m][0] for m in range(1, max_mutations + 1)])
+    mutations = [muts for m in range(1, max_mutations + 1) for muts in fronts[m][1]]
+    objectives, mutations = _non_dominated(objectives, mutations)
+    return objectives, [list(muts) for muts in mutations]
+
+
+def apply_mutations(start_seq: str, mutations):
+    """Return start_seq with the given 1-based (position, substitution) changes."""
+    seq_list = list(start_seq)
+    for pos, sub in mutations:
+        seq_list[pos - 1] = sub
+    return "".join(seq_list)
+
+
+def optimize_multi_mutations(start_seq: str = BASE_GLP1, top_k: int = 5, max_mutations: int = 2):
+    """
+    Top_k multi-site GLP-1 designs with up to max_mutations substitutions.
+    Each result lists its mutations; the score is recomputed on the final
+    sequence with the regular batch scorer.
+    """
+    combos = top_k_combinations(start_seq, top_k, max_mutations)
+    if not combos:
+        return []
+
+    seqs = [apply_mutations(start_seq, muts) for _, muts in combos]
+    scores = score_sequences_for_diabetes(seqs)
+
+    results = [
+        {
+            "sequence": seq,
+            "mutations": [{"position": pos, "substitution": sub} for pos, sub in muts],
+            "score": float(score),
+        }
+        for seq, (_, muts), score in zip(seqs, combos, scores)
+    ]
+    results.sort(key=lambda x: x["score"], reverse=True)
+    return results
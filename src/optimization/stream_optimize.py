@@ -0,0 +1,118 @@
+import heapq
+from itertools import islice
+
+import numpy as np
+
+from models.ms_features import ms_features, point_mutant_features
+from optimization.generate_glp1_candidates import apply_mutation, iter_single_mutations
+from optimization.optimize_ms import AMINO_ACIDS, _is_normalized
+from optimization.parallel_scoring import score_ms_features
+from optimization.score_glp1_sequence import (
+    score_point_mutants_for_diabetes,
+    score_point_mutants_for_obesity,
+)
+
+_GLP1_SCORERS = {
+    "diabetes": score_point_mutants_for_diabetes,
+    "obesity": score_point_mutants_for_obesity,
+}
+
+
+class _RunningTopK:
+    """
+    Bounded min-heap of the best candidates seen so far. Among equal
+    scores the earliest candidate wins, matching the stable sort used by
+    the optimize_for_* functions.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap = []  # (score, -index, candidate)
+
+    def push(self, index: int, score: float, make_candidate):
+        entry_key = (score, -index)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (score, -index, make_candidate()))
+        elif entry_key > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, (score, -index, make_candidate()))
+
+    def ranked(self):
+        return [c for _, _, c in sorted(self.heap, key=lambda e: (-e[0], -e[1]))]
+
+
+def _glp1_chunks(disease, start_seq, chunk_size):
+    """Yield (total, [(make_candidate, score), ...]) per scored chunk."""
+    total = sum(1 for _ in iter_single_mutations(start_seq))
+    scorer = _GLP1_SCORERS[disease]
+    mutations = iter_single_mutations(start_seq)
+    while True:
+        chunk = list(islice(mutations, chunk_size))
+        if not chunk:
+            return
+        scores = scorer(start_seq, chunk)
+        yield total, [
+            (lambda p=p, aa=aa, s=s: {
+                "sequence": apply_mutation(start_seq, p, aa),
+                "position": p,
+                "substitution": aa,
+                "score": float(s),
+            }, float(s))
+            for (p, aa), s in zip(chunk, scores)
+        ]
+
+
+def _ms_chunks(start_seq, chunk_size):
+    """Yield (total, [(make_candidate, score), ...]) per block of positions."""
+    alphabet = "".join(AMINO_ACIDS)
+    L = len(start_seq)
+    total = sum(1 for ch in start_seq for aa in alphabet if ch != aa)
+    block = max(1, chunk_size // (len(alphabet) - 1))
+    fast = _is_normalized(start_seq)
+
+    def mutant(i, aa):
+        return start_seq[:i] + aa + start_seq[i + 1:]
+
+    for first in range(0, L, block):
+        sites = np.arange(first, min(L, first + block))
+        if fast:
+            pos, sub, X = point_mutant_features(start_seq, alphabet, positions=sites)
+            muts = [(int(i), chr(a)) for i, a in zip(pos, sub)]
+        else:
+            muts = [(int(i), aa) for i in sites for aa in alphabet if start_seq[i] != aa]
+            X = ms_features([mutant(i, aa) for i, aa in muts])
+
+        scores = score_ms_features(X)
+        yield total, [
+            (lambda i=i, aa=aa, s=s: {"sequence": mutant(i, aa), "score": float(s)}, float(s))
+            for (i, aa), s in zip(muts, scores)
+        ]
+
+
+def stream_optimize(disease: str, start_seq: str, top_k: int = 5, chunk_size: int = 256):
+    """
+    Single-mutation optimization that yields events as chunks of candidates
+    are scored, instead of returning only once everything is ranked.
+
+    Events (dicts):
+      {"event": "progress", "scored": n, "total": N, "top": [...]}  after each chunk
+      {"event": "result", "candidates": [...]}                       once, at the end
+
+    Only the running top_k is kept in memory; candidate sequences are built
+    only for entries that make it into the top_k. The final candidates are
+    identical to those of optimize_for_diabetes/obesity/ms.
+    """
+    chunk_size = max(1, chunk_size)
+    if disease == "ms":
+        chunks = _ms_chunks(start_seq, chunk_size)
+    else:
+        chunks = _glp1_chunks(disease, start_seq, chunk_size)
+
+    top = _RunningTopK(top_k)
+    scored = 0
+    for total, items in chunks:
+        for make_candidate, score in items:
+            top.push(scored, score, make_candidate)
+            scored += 1
+        yield {"event": "progress", "scored": scored, "total": total, "top": top.ranked()}
+
+    yield {"event": "result", "candidates": top.ranked()}
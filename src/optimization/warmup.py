@@ -0,0 +1,55 @@
+import time
+
+from optimization.generate_glp1_candidates import get_allowed_by_pos
+from optimization.optimize_glp1 import optimize_for_diabetes, optimize_for_obesity, optimize_pareto
+from optimization.optimize_ms import optimize_for_ms
+from optimization import score_glp1_sequence, score_ms_sequence
+from optimization.score_glp1_sequence import BASE_GLP1, get_effect_table
+from optimization.score_ms_sequence import _load_model_ms
+
+# Short glatiramer-like peptide used for the MS warm-up inference
+MS_WARMUP_SEQ = "AEKAEKAEKAEK"
+
+
+def warm_up(timings=None):
+    """
+    Load every artifact the serving path needs, build derived lookup
+    structures and run one warm-up inference per disease.
+
+    Fills `timings` (step name -> seconds) as each step finishes, so a
+    caller sharing the dict can report progress, and returns it.
+    Exceptions propagate so the caller can report the failed step.
+    """
+    steps = [
+        ("glp1_substitution_index", get_allowed_by_pos),
+        ("glp1_effect_table", get_effect_table),
+        ("ms_model", _load_model_ms),
+        ("inference_diabetes", lambda: optimize_for_diabetes(BASE_GLP1, 1)),
+        ("inference_obesity", lambda: optimize_for_obesity(BASE_GLP1, 1)),
+        ("inference_pareto", lambda: optimize_pareto(BASE_GLP1, 1)),
+        ("inference_ms", lambda: optimize_for_ms(MS_WARMUP_SEQ, 1)),
+    ]
+
+    timings = {} if timings is None else timings
+    for name, step in steps:
+        t0 = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            raise RuntimeError(f"warm-up step '{name}' failed: {e}") from e
+        timings[name] = time.perf_counter() - t0
+
+    return timings
+
+
+def reload_models():
+    """
+    Swap in newly activated registry versions of the GLP-1 and MS models.
+
+    Each new version is loaded and exercised with one warm-up inference
+    while the previous one keeps serving, then swapped in atomically.
+    Returns {model: served version}.
+    """
+    glp1 = score_glp1_sequence.reload_model(warm=lambda _: optimize_for_diabetes(BASE_GLP1, 1))
+    ms = score_ms_sequence.reload_model(warm=lambda _: optimize_for_ms(MS_WARMUP_SEQ, 1))
+    return {"glp1": glp1.version, "ms": ms.version}
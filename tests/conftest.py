@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The app imports `src.*`, the pipeline modules import each other top-level
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (ROOT, os.path.join(ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Keep test runs out of the shared on-disk score cache
+os.environ.setdefault("PEPTIDE_SCORE_CACHE", "0")
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from src.app.admission import AdmissionController, Overloaded, SingleFlight
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _hold(controller, release, errors):
+    try:
+        with controller.slot():
+            release.wait(5)
+    except Overloaded as e:
+        errors.append(e)
+
+
+def test_admission_sheds_once_queue_is_full():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+    release = threading.Event()
+    errors = []
+    threads = [threading.Thread(target=_hold, args=(controller, release, errors)) for _ in range(2)]
+
+    threads[0].start()
+    _wait_until(lambda: controller.running == 1)
+    threads[1].start()
+    _wait_until(lambda: controller.waiting == 1)
+
+    # One running, one queued: the next request is rejected without waiting
+    start = time.monotonic()
+    with pytest.raises(Overloaded):
+        with controller.slot():
+            pass
+    assert time.monotonic() - start < 1
+
+    release.set()
+    for t in threads:
+        t.join()
+    assert errors == []
+    stats = controller.stats()
+    assert (stats["admitted"], stats["rejected"], stats["running"], stats["waiting"]) == (2, 1, 0, 0)
+
+
+def test_admission_times_out_waiters():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    release = threading.Event()
+    holder = threading.Thread(target=_hold, args=(controller, release, []))
+    holder.start()
+    _wait_until(lambda: controller.running == 1)
+
+    with pytest.raises(Overloaded):
+        with controller.slot():
+            pass
+
+    release.set()
+    holder.join()
+    assert controller.stats()["timeouts"] == 1
+    with controller.slot():
+        pass
+
+
+def test_single_flight_followers_get_leader_exception():
+    flight = SingleFlight()
+    entered = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        entered.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    outcomes = []
+
+    def run():
+        try:
+            outcomes.append(flight.do("key", fail))
+        except ValueError as e:
+            outcomes.append(e)
+
+    leader = threading.Thread(target=run)
+    leader.start()
+    entered.wait(5)
+    followers = [threading.Thread(target=run) for _ in range(2)]
+    for t in followers:
+        t.start()
+    _wait_until(lambda: flight.stats()["coalesced"] == 2)
+
+    release.set()
+    for t in [leader, *followers]:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(outcomes) == 3
+    assert all(isinstance(o, ValueError) and str(o) == "boom" for o in outcomes)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_single_flight_shares_result():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    # Finished calls are not kept
+    assert flight.do("a", lambda: 2) == (2, False)
+
+
+def test_reserved_slot_is_released_once():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=0)
+    release = controller.reserve()
+    with pytest.raises(Overloaded):
+        controller.reserve()
+    release()
+    release()
+    assert controller.stats()["running"] == 0
+    controller.reserve()
+    assert controller.stats()["running"] == 1
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    # No lifespan: no model warm-up, reload watcher or job queue
+    return TestClient(app)
+
+
+def test_invalid_request_is_400(client):
+    response = client.post("/optimize", json={"disease": "flu", "starting_sequence": "HAEG"})
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+def test_batch_item_errors_are_reported_per_item(client):
+    items = [
+        {"disease": "diabetes", "starting_sequence": "HAEGTFTSDVSSYLEGQAAKEFIAWLVKGR", "top_k": 2},
+        {"disease": "flu", "starting_sequence": "HAEG"},
+    ]
+    response = client.post("/optimize/batch", json={"items": items})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["n_errors"] == 1
+    assert "error" in body["results"][1] and len(body["results"][0]["candidates"]) == 2
+
+
+def test_batch_without_item_errors_fails_with_400(client):
+    items = [
+        {"disease": "diabetes", "starting_sequence": "HAEGTFTSDVSSYLEGQAAKEFIAWLVKGR"},
+        {"disease": "flu", "starting_sequence": "HAEG"},
+    ]
+    response = client.post("/optimize/batch", json={"items": items, "return_errors": False})
+    assert response.status_code == 400
+    assert response.json()["error"].startswith("Item 1 failed")
+
+
+def test_stream_is_admission_controlled(client, monkeypatch):
+    from src.app import main
+
+    admission = main.AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=0)
+    monkeypatch.setattr(main, "ADMISSION", admission)
+    request = {"disease": "diabetes", "starting_sequence": "HAEGTFTSDVSSYLEGQAAKEFIAWLVKGR", "top_k": 2}
+
+    release = admission.reserve()
+    response = client.post("/optimize/stream", json=request)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+    release()
+    response = client.post("/optimize/stream", json=request)
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[-1])["event"] == "result"
+    # The stream gave its slot back
+    assert admission.stats()["running"] == 0
+    assert admission.stats()["admitted"] == 2
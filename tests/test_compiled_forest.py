@@ -0,0 +1,115 @@
+import logging
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from models.compiled_forest import CompiledForest, export_forest, load_compiled_if_current
+
+
+def _data(seed=0, n=300, d=6):
+    rng = np.random.default_rng(seed)
+    # Coarse grid so many samples sit exactly on split values
+    X = np.round(rng.normal(size=(n, d)), 1)
+    y = X[:, 0] - 2 * X[:, 1] + np.sin(3 * X[:, 2]) + 0.1 * rng.normal(size=n)
+    return X, y
+
+
+def _threshold_inputs(forest, X):
+    """Rows with one feature set exactly at (and one float32 step around) each split."""
+    rows = []
+    base = X[0]
+    for est in forest.estimators_:
+        tree = est.tree_
+        for f, t in zip(tree.feature, tree.threshold):
+            if f < 0:
+                continue
+            t32 = np.float32(t)
+            for v in (t, t32, np.nextafter(t32, np.float32(-np.inf)), np.nextafter(t32, np.float32(np.inf))):
+                row = base.copy()
+                row[f] = v
+                rows.append(row)
+    return np.asarray(rows)
+
+
+@pytest.fixture(scope="module")
+def regressor():
+    X, y = _data()
+    return RandomForestRegressor(n_estimators=15, max_depth=8, random_state=0).fit(X, y), X
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    X, y = _data(seed=1)
+    labels = np.digitize(y, [-1.0, 1.0])  # three classes
+    return RandomForestClassifier(n_estimators=15, random_state=0).fit(X, labels), X
+
+
+def test_regressor_matches_sklearn(regressor):
+    model, X = regressor
+    forest = CompiledForest.from_sklearn(model)
+    X_test = np.vstack([X, np.random.default_rng(2).normal(size=(200, X.shape[1]))])
+    np.testing.assert_allclose(forest.predict(X_test), model.predict(X_test), rtol=0, atol=1e-12)
+
+
+def test_regressor_matches_sklearn_at_split_thresholds(regressor):
+    model, X = regressor
+    forest = CompiledForest.from_sklearn(model)
+    X_test = _threshold_inputs(model, X)
+    np.testing.assert_allclose(forest.predict(X_test), model.predict(X_test), rtol=0, atol=1e-12)
+
+
+def test_classifier_matches_sklearn(classifier):
+    model, X = classifier
+    forest = CompiledForest.from_sklearn(model)
+    X_test = np.vstack([X, _threshold_inputs(model, X)])
+    np.testing.assert_allclose(forest.predict_proba(X_test), model.predict_proba(X_test), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(forest.predict(X_test), model.predict(X_test))
+
+
+def test_save_load_roundtrip(regressor, tmp_path):
+    model, X = regressor
+    path = tmp_path / "forest.npz"
+    CompiledForest.from_sklearn(model).save(path, source_version="abc")
+    forest = CompiledForest.load(path)
+    assert forest.source_version == "abc"
+    np.testing.assert_array_equal(forest.predict(X), CompiledForest.from_sklearn(model).predict(X))
+
+
+def test_rejects_wrong_feature_count(regressor):
+    model, X = regressor
+    with pytest.raises(ValueError):
+        CompiledForest.from_sklearn(model).predict(X[:, :-1])
+
+
+def test_predict_proba_only_for_classifiers(regressor):
+    model, X = regressor
+    with pytest.raises(AttributeError):
+        CompiledForest.from_sklearn(model).predict_proba(X)
+
+
+def test_compiled_forest_survives_new_mtime(regressor, tmp_path):
+    joblib = pytest.importorskip("joblib")
+    model, X = regressor
+    model_path = str(tmp_path / "model.pkl")
+    joblib.dump(model, model_path)
+    export_forest(model, model_path)
+
+    # A fresh checkout rewrites every mtime, but not the contents
+    os.utime(model_path, ns=(0, 0))
+    forest = load_compiled_if_current(model_path)
+    assert forest is not None
+    np.testing.assert_allclose(forest.predict(X), model.predict(X), rtol=0, atol=1e-12)
+
+
+def test_stale_compiled_forest_is_skipped(regressor, classifier, tmp_path, caplog):
+    joblib = pytest.importorskip("joblib")
+    model_path = str(tmp_path / "model.pkl")
+    joblib.dump(regressor[0], model_path)
+    export_forest(regressor[0], model_path)
+    joblib.dump(classifier[0], model_path)
+
+    with caplog.at_level(logging.WARNING, logger="models.compiled_forest"):
+        assert load_compiled_if_current(model_path) is None
+    assert "stale compiled forest" in caplog.text
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from models.features_glp1 import GLP1FeatureEncoder
+from optimization import score_glp1_sequence as glp1
+
+joblib = pytest.importorskip("joblib")
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    """Encoder and a small potency model saved in a model directory."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        [(pos, sub) for pos in range(1, len(glp1.BASE_GLP1) + 1) for sub in glp1.AMINO_ACIDS],
+        columns=["Position", "Substitution"],
+    )
+    encoder = GLP1FeatureEncoder()
+    X = encoder.fit_transform(df)
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, rng.normal(size=len(df)))
+    joblib.dump(encoder, tmp_path / glp1.ENCODER_FILE)
+    joblib.dump(model, tmp_path / glp1.MODEL_FILE)
+    return str(tmp_path), encoder, model
+
+
+def test_model_version_ignores_file_times(artifacts):
+    directory, _, _ = artifacts
+    version = glp1.model_version(directory)
+    for name in (glp1.ENCODER_FILE, glp1.MODEL_FILE):
+        os.utime(os.path.join(directory, name), ns=(0, 0))
+    assert glp1.model_version(directory) == version
+
+
+def test_stale_effect_table_is_rebuilt_in_memory(artifacts):
+    directory, encoder, model = artifacts
+    table_path = os.path.join(directory, glp1.EFFECT_TABLE_FILE)
+    expected = glp1.build_effect_table(encoder, model)
+
+    # Missing table: rebuilt, but nothing is written while serving
+    table, loaded_encoder, _ = glp1._load_table(directory, glp1.MODEL_FILE, glp1.EFFECT_TABLE_FILE)
+    np.testing.assert_allclose(table, expected)
+    assert loaded_encoder is not None
+    assert not os.path.exists(table_path)
+
+    # Stale table: rebuilt and left untouched
+    glp1.save_effect_table(np.zeros_like(expected), "old-version", table_path)
+    before = open(table_path, "rb").read()
+    table, _, _ = glp1._load_table(directory, glp1.MODEL_FILE, glp1.EFFECT_TABLE_FILE)
+    np.testing.assert_allclose(table, expected)
+    assert open(table_path, "rb").read() == before
+
+    # Current table: read from disk, without loading the model
+    glp1.save_effect_table(expected, glp1.model_version(directory), table_path)
+    table, loaded_encoder, _ = glp1._load_table(directory, glp1.MODEL_FILE, glp1.EFFECT_TABLE_FILE)
+    np.testing.assert_allclose(table, expected)
+    assert loaded_encoder is None
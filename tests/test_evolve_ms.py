@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from optimization import evolve_ms, score_ms_sequence
+
+
+class ConstantModel:
+    """MS model scoring every peptide the same."""
+
+    def __init__(self, p):
+        self.p = p
+
+    def predict_proba(self, X):
+        return np.column_stack([1 - np.full(len(X), self.p), np.full(len(X), self.p)])
+
+
+@pytest.fixture
+def restore_ms_model():
+    snapshot = score_ms_sequence.MODEL_SLOT.get()
+    yield
+    score_ms_sequence.MODEL_SLOT.swap(snapshot)
+
+
+def test_pool_workers_keep_the_run_model_version(restore_ms_model):
+    score_ms_sequence.install_model(ConstantModel(0.25), version="run")
+    evaluate = evolve_ms._Evaluator(n_workers=2)
+    try:
+        # A hot reload while the run is in progress
+        score_ms_sequence.install_model(ConstantModel(0.75), version="reloaded")
+        rng = np.random.default_rng(0)
+        pop = rng.choice(evolve_ms._ALPHABET, size=(50, 12))
+        scores = evaluate(pop)
+    finally:
+        evaluate.close()
+    np.testing.assert_array_equal(scores, 0.25)
+
+
+def test_parallel_run_matches_serial_run():
+    serial = evolve_ms.evolve_for_ms("AEKAEKAEKAEK", generations=5, population_size=40, seed=1)
+    parallel = evolve_ms.evolve_for_ms("AEKAEKAEKAEK", generations=5, population_size=40, seed=1, n_workers=2)
+    assert parallel == serial
@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+# Runs in a fresh interpreter: records file-system side effects of the
+# imports with an audit hook and reports them with the loaded modules
+_PROBE = r"""
+import json, os, sys
+
+DATA_SUFFIXES = (".pkl", ".npz", ".csv", ".xlsx", ".json", ".sqlite3")
+DATA_DIR = os.path.join(sys.argv[1], "data") + os.sep
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+events = []
+
+def hook(event, args):
+    if event == "open":
+        path, mode, flags = args
+        if not isinstance(path, str):
+            return
+        writes = any(c in (mode or "") for c in "wax+") or (mode is None and flags & WRITE_FLAGS)
+        if writes or path.endswith(DATA_SUFFIXES) or os.path.abspath(path).startswith(DATA_DIR):
+            events.append([event, path, mode])
+    elif event in ("os.mkdir", "sqlite3.connect"):
+        events.append([event, str(args[0]), None])
+
+sys.addaudithook(hook)
+
+import src.optimization.optimize_glp1
+import src.optimization.optimize_ms
+import src.app.main
+
+sys.stdout.write(json.dumps({"events": events, "modules": sorted(sys.modules)}))
+"""
+
+
+def test_api_import_is_lazy(tmp_path):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([ROOT, os.path.join(ROOT, "src")])
+    # Bytecode writes would otherwise show up as file creation
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE, ROOT],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(out.stdout)
+
+    assert report["events"] == []
+    assert "pandas" not in report["modules"]
+    assert "sklearn" not in report["modules"]
+    assert list(tmp_path.iterdir()) == []
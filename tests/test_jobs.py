@@ -0,0 +1,134 @@
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.app import jobs
+from src.app.jobs import JobQueue, JobStore
+
+
+def _wait_for(store, job_id, predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = store.get(job_id)
+        if predicate(job):
+            return job
+        assert time.monotonic() < deadline, f"timed out: {job}"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+@pytest.fixture
+def queue(store, monkeypatch):
+    """A queue running jobs on one thread in this process, with a "wait" job kind."""
+    def run_wait(params, report):
+        while True:
+            report(0.5, "waiting", force=True)
+            time.sleep(0.01)
+
+    monkeypatch.setitem(jobs.RUNNERS, "wait", run_wait)
+    monkeypatch.setattr(jobs, "reload_models", lambda: None)
+    queue = JobQueue(store, workers=1)
+    queue._new_pool = lambda: ThreadPoolExecutor(max_workers=1)
+    yield queue
+    queue.close()
+
+
+def test_claim_is_atomic_under_races(store):
+    job_ids = [store.create("optimize", {}) for _ in range(20)]
+    callers = 4
+    barrier = threading.Barrier(callers)
+    claims = [[] for _ in range(callers)]
+
+    def claim_all(i):
+        for job_id in job_ids:
+            barrier.wait()
+            claims[i].append(store.claim(job_id, f"worker-{i}") is not None)
+
+    threads = [threading.Thread(target=claim_all, args=(i,)) for i in range(callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Every job is claimed by exactly one caller, once
+    for n, job_id in enumerate(job_ids):
+        assert sum(c[n] for c in claims) == 1
+        job = store.get(job_id)
+        assert job["status"] == "running" and job["attempts"] == 1
+        assert job["owner"] == f"worker-{[c[n] for c in claims].index(True)}"
+
+
+def test_cancel_queued_and_running_jobs(queue, store):
+    running = queue.submit("wait", {})
+    _wait_for(store, running, lambda j: j["status"] == "running")
+    # The only worker is busy, so this one stays queued
+    queued = queue.submit("wait", {})
+
+    job = queue.cancel(queued)
+    assert job["status"] == "cancelled"
+    assert store.claim(queued, "late-worker") is None
+
+    job = queue.cancel(running)
+    assert job["status"] == "running" and job["cancel_requested"]
+    job = _wait_for(store, running, lambda j: j["status"] != "running")
+    assert job["status"] == "cancelled"
+    assert store.get(queued)["status"] == "cancelled"
+
+
+def test_cancel_finished_job_is_a_no_op(store):
+    job_id = store.create("optimize", {})
+    store.claim(job_id, "w")
+    store.finish(job_id, "succeeded", result={"ok": True}, owner="w")
+    assert store.cancel(job_id)["status"] == "succeeded"
+
+
+def test_recover_skips_jobs_of_live_owners(store):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    alive, orphaned, stale = (store.create("optimize", {}) for _ in range(3))
+    store.claim(alive, jobs.worker_id())
+    store.claim(orphaned, f"{jobs.worker_id().rpartition(':')[0]}:{dead.pid}")
+    store.claim(stale, "other-host:1")
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = 0 WHERE id = ?", (stale,))
+
+    assert sorted(store.recover()) == sorted([orphaned, stale])
+    assert store.get(alive)["status"] == "running"
+    # A worker whose job was taken back is told to stop
+    assert store.set_progress(orphaned, 0.5, f"{jobs.worker_id().rpartition(':')[0]}:{dead.pid}")
+
+
+def test_broken_pool_fails_job_after_max_attempts(store, monkeypatch):
+    class BrokenPool:
+        submits = 0
+
+        def submit(self, fn, *args):
+            BrokenPool.submits += 1
+            future = Future()
+            future.set_exception(BrokenProcessPool("worker died on start-up"))
+            return future
+
+        def shutdown(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(jobs, "RESUBMIT_BACKOFF", 0.01)
+    queue = JobQueue(store, workers=1)
+    queue._new_pool = BrokenPool
+    try:
+        job_id = queue.submit("optimize", {})
+        job = _wait_for(store, job_id, lambda j: j["status"] != "queued")
+    finally:
+        queue.close()
+
+    assert job["status"] == "failed"
+    assert "worker pool failed" in job["error"]
+    assert BrokenPool.submits == jobs.MAX_ATTEMPTS + 1